@@ -5,13 +5,37 @@ import sys
 import venv
 from pathlib import Path
 
+# Standard library modules that are not used at runtime and are excluded from the bundle
+EXCLUDED_MODULES = ["tkinter.test", "unittest", "pydoc_data"]
+
+# File types that are stored as-is in the distribution zip
+PRECOMPRESSED_EXTENSIONS = (".zip", ".pyz", ".gz", ".png", ".jpg")
+
+DIST_DIR = "dist/WinSCPAutomation"
+DIST_SUBDIRS = ("config", "lib", "lib/WinSCP", "logs", "resources")
+
+# Files copied next to the executable: (source, destination directory, warn if missing)
+RESOURCES = (
+    ("lib/WinSCP/WinSCPnet.dll", f"{DIST_DIR}/lib/WinSCP", True),
+    ("README.md", DIST_DIR, False),
+    ("requirements.txt", DIST_DIR, False),
+    ("resources/icon.ico", f"{DIST_DIR}/resources", False),
+)
+
 def create_and_use_venv():
     """Create a dedicated virtual environment for building"""
     venv_dir = "build_venv"
     print(f"Creating virtual environment in {venv_dir}...")
     
+    # Prefer uv when it is available: it creates the venv without ensurepip
+    # and resolves/installs dependencies much faster than pip
+    uv = shutil.which("uv")
+    
     # Create the virtual environment
-    venv.create(venv_dir, with_pip=True)
+    if uv:
+        subprocess.check_call([uv, "venv", venv_dir, "--python", sys.executable])
+    else:
+        venv.create(venv_dir, with_pip=True)
     
     # Determine the path to the Python executable in the virtual environment
     if os.name == 'nt':  # Windows
@@ -21,8 +45,16 @@ def create_and_use_venv():
     
     # Install dependencies in the virtual environment
     print("Installing dependencies in virtual environment...")
-    subprocess.check_call([python_executable, "-m", "pip", "install", "-r", "requirements.txt"])
-    subprocess.check_call([python_executable, "-m", "pip", "install", "pyinstaller"])
+    if uv:
+        install_cmd = [uv, "pip", "install", "--python", python_executable]
+    else:
+        install_cmd = [python_executable, "-m", "pip", "install"]
+    # A single install run resolves everything in one pass; the build script holds
+    # no descriptors worth protecting, so skip the close_fds sweep on POSIX
+    subprocess.check_call(
+        install_cmd + ["-r", "requirements.txt", "pyinstaller"],
+        close_fds=(os.name != 'posix')
+    )
     
     print(f"Virtual environment created and dependencies installed in {venv_dir}")
     return python_executable
@@ -37,65 +69,65 @@ def clean_build_dirs():
 
 def copy_resources():
     """Copy necessary resource files to the dist directory"""
-    # Create required directories
-    os.makedirs("dist/WinSCPAutomation/config", exist_ok=True)
-    os.makedirs("dist/WinSCPAutomation/lib/WinSCP", exist_ok=True)
-    os.makedirs("dist/WinSCPAutomation/logs", exist_ok=True)
+    # Create required directories: the shared parent once, then each
+    # sub-directory (parents listed before children) with a single mkdir
+    os.makedirs(DIST_DIR, exist_ok=True)
+    for sub_dir in DIST_SUBDIRS:
+        try:
+            os.mkdir(os.path.join(DIST_DIR, sub_dir))
+        except FileExistsError:
+            pass
     
-    # Copy config files
+    # Copy config files in a single directory scan; copyfile uses the
+    # platform's in-kernel copy (sendfile / CopyFileEx) where available
     print("Copying configuration files...")
-    if os.path.exists("config/app_config.json"):
-        shutil.copy("config/app_config.json", "dist/WinSCPAutomation/config/")
-    else:
-        print("WARNING: app_config.json not found!")
-        
-    if os.path.exists("config/devices.ini"):
-        shutil.copy("config/devices.ini", "dist/WinSCPAutomation/config/")
-    else:
-        print("WARNING: devices.ini not found!")
-        
-    if os.path.exists("config/Demo.dat"):
-        shutil.copy("config/Demo.dat", "dist/WinSCPAutomation/config/")
-    else:
-        print("WARNING: Demo.dat not found!")
-    
-    # Copy WinSCP DLL
-    print("Copying WinSCP DLL...")
-    winscp_dll = "lib/WinSCP/WinSCPnet.dll"
-    if os.path.exists(winscp_dll):
-        shutil.copy(winscp_dll, "dist/WinSCPAutomation/lib/WinSCP/")
-    else:
-        print(f"WARNING: {winscp_dll} not found! You need to add it manually.")
-    
+    copied = set()
+    with os.scandir("config") as entries:
+        for entry in entries:
+            if entry.is_file():
+                shutil.copyfile(entry.path, os.path.join(f"{DIST_DIR}/config", entry.name))
+                copied.add(entry.name)
+
+    for name in ("app_config.json", "devices.ini", "Demo.dat"):
+        if name not in copied:
+            print(f"WARNING: {name} not found!")
+
     # Create placeholder for logs
-    with open("dist/WinSCPAutomation/logs/.gitkeep", "w") as f:
+    with open(f"{DIST_DIR}/logs/.gitkeep", "w") as f:
         f.write("# Placeholder for log files")
     
-    # Copy README and licenses
-    if os.path.exists("README.md"):
-        shutil.copy("README.md", "dist/WinSCPAutomation/")
-    
-    # Copy requirements.txt for reference
-    if os.path.exists("requirements.txt"):
-        shutil.copy("requirements.txt", "dist/WinSCPAutomation/")
-    
-    # Copy icon if it exists
-    if os.path.exists("resources/icon.ico"):
-        os.makedirs("dist/WinSCPAutomation/resources", exist_ok=True)
-        shutil.copy("resources/icon.ico", "dist/WinSCPAutomation/resources/")
+    # Copy the remaining resources; the copy's own open() tells us whether
+    # the source exists, so no separate existence check is needed
+    print("Copying resource files...")
+    for src, dst_dir, warn_if_missing in RESOURCES:
+        try:
+            shutil.copy(src, dst_dir)
+        except FileNotFoundError:
+            if warn_if_missing:
+                print(f"WARNING: {src} not found! You need to add it manually.")
     
     print("Resource files copied successfully")
 
+def scan_dir_names(path):
+    """Return the names of the entries in a directory with one scan, or an empty set if it is missing"""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries}
+    except FileNotFoundError:
+        return set()
+
 def create_resources_dir():
     """Create resources directory if it doesn't exist"""
     if not os.path.exists("resources"):
         os.makedirs("resources", exist_ok=True)
         print("Created resources directory")
 
-def check_for_icon():
+def check_for_icon(present_resources=None):
     """Check if icon exists, if not create a placeholder message"""
     icon_path = "resources/icon.ico"
-    if not os.path.exists(icon_path):
+    if present_resources is None:
+        present_resources = scan_dir_names("resources")
+    if "icon.ico" not in present_resources:
         print(f"WARNING: Icon file {icon_path} not found!")
         print("If you haven't created an icon yet, please create one and place it at resources/icon.ico")
         print("The build will continue with a default icon.")
@@ -113,12 +145,15 @@ def build_executable(python_executable):
     # Clean previous builds
     clean_build_dirs()
     
+    # List the resources directory once and answer existence checks from it
+    present_resources = scan_dir_names("resources")
+    
     # Check for icon
-    check_for_icon()
+    check_for_icon(present_resources)
     
     # Determine icon path - use it if it exists, otherwise let PyInstaller use default
     icon_param = []
-    if os.path.exists("resources/icon.ico"):
+    if "icon.ico" in present_resources:
         icon_param = ["--icon=resources/icon.ico"]
     
     # Build the command
@@ -128,11 +163,17 @@ def build_executable(python_executable):
         "PyInstaller",
         "--name=WinSCPAutomation",
         "--windowed",
+        "--onedir",
+        "--noupx",
         "--noconfirm",
         "--add-data=config;config" if os.name == 'nt' else "--add-data=config:config",
         "--add-data=lib;lib" if os.name == 'nt' else "--add-data=lib:lib",
     ]
     
+    # Exclude stdlib modules the application never imports to shrink the
+    # dependency graph PyInstaller has to analyse
+    cmd.extend(f"--exclude-module={module}" for module in EXCLUDED_MODULES)
+
     # Add icon parameter if available
     if icon_param:
         cmd.extend(icon_param)
@@ -149,26 +190,64 @@ def build_executable(python_executable):
     
     print("Build completed. Executable is in the dist/WinSCPAutomation directory.")
 
-def create_distribution_zip():
+def get_build_mode():
+    """Return the build mode from the BUILD_MODE environment variable ('ci' or 'release')"""
+    return os.environ.get("BUILD_MODE", "release").lower()
+
+def create_distribution_zip(compresslevel=None):
     """Create a zip file of the distribution"""
     import zipfile
     
+    # CI archives are thrown away shortly after the build, favour speed there
+    if compresslevel is None:
+        compresslevel = 1 if get_build_mode() == "ci" else 9
+    
     dist_dir = "dist/WinSCPAutomation"
     output_zip = "dist/WinSCPAutomation.zip"
     
     if os.path.exists(dist_dir):
         print(f"Creating distribution zip file: {output_zip}")
-        with zipfile.ZipFile(output_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        with zipfile.ZipFile(output_zip, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zipf:
             for root, _, files in os.walk(dist_dir):
                 for file in files:
                     file_path = os.path.join(root, file)
                     arcname = os.path.relpath(file_path, "dist")
-                    zipf.write(file_path, arcname)
+                    # Archives produced by PyInstaller are already compressed,
+                    # deflating them again costs time for no size gain
+                    if file.endswith(PRECOMPRESSED_EXTENSIONS):
+                        zipf.write(file_path, arcname, compress_type=zipfile.ZIP_STORED)
+                    else:
+                        zipf.write(file_path, arcname)
         
         print(f"Distribution zip file created: {output_zip}")
     else:
         print(f"ERROR: Distribution directory {dist_dir} not found. Zip file not created.")
 
+def create_distribution_tarball():
+    """Create a .tar.zst archive of the distribution if zstandard is installed"""
+    import tarfile
+    try:
+        import zstandard
+    except ImportError:
+        print("zstandard not installed, skipping .tar.zst archive")
+        return
+    
+    dist_dir = "dist/WinSCPAutomation"
+    output_tar = "dist/WinSCPAutomation.tar.zst"
+    
+    if os.path.exists(dist_dir):
+        print(f"Creating distribution tarball: {output_tar}")
+        # threads=-1 lets zstd spread frame encoding across all cores
+        compressor = zstandard.ZstdCompressor(level=3, threads=-1)
+        with open(output_tar, "wb") as raw:
+            with compressor.stream_writer(raw) as writer:
+                with tarfile.open(fileobj=writer, mode="w|") as tar:
+                    tar.add(dist_dir, arcname=os.path.basename(dist_dir))
+        
+        print(f"Distribution tarball created: {output_tar}")
+    else:
+        print(f"ERROR: Distribution directory {dist_dir} not found. Tarball not created.")
+
 def main():
     """Main build function"""
     print("Starting build process for WinSCP Automation Tool...")
@@ -188,6 +267,10 @@ def main():
         # Create distribution zip
         create_distribution_zip()
         
+        # CI builds also get a zstd tarball, which is much faster to produce
+        if get_build_mode() == "ci":
+            create_distribution_tarball()
+        
         print("\nBuild process completed successfully!")
         print("You can find the executable in the dist/WinSCPAutomation directory")
         print("A zip distribution is available at dist/WinSCPAutomation.zip")
@@ -1,19 +1,35 @@
 # src/archive.py
 import os
 from datetime import datetime
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def ensure_base_path(base_download_path):
+    # Create the base download folder once per run; later archive folders
+    # only need to create their own leaf directory
+    os.makedirs(base_download_path, exist_ok=True)
+    return base_download_path
 
 def create_archive_path(device_name, base_download_path):
     # Get the current date and time
-    current_time = datetime.now()
-    formatted_time = current_time.strftime("%Y_%m_%d %H-%M-%S")
-    
+    t = datetime.now()
+    formatted_time = f"{t.year:04d}_{t.month:02d}_{t.day:02d} {t.hour:02d}-{t.minute:02d}-{t.second:02d}"
+
     # Create the folder name: "YYYY_MM_DD HH-MM-SS device_name"
     folder_name = f"{formatted_time} {device_name}"
-    
+
     # Full path for the archive folder
-    archive_path = os.path.join(base_download_path, folder_name)
+    archive_path = os.path.join(ensure_base_path(base_download_path), folder_name)
 
     # Create the folder if it doesn't exist
-    os.makedirs(archive_path, exist_ok=True)
-    
+    try:
+        os.mkdir(archive_path)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        # The base folder was removed (or its drive remounted) since it was
+        # cached; forget it and create the whole path again
+        ensure_base_path.cache_clear()
+        os.makedirs(archive_path, exist_ok=True)
+
     return archive_path
@@ -1,12 +1,19 @@
 # src/config_manager.py
 
 import os
+import copy
 import logging
 import json
 import configparser
-from typing import Dict, Any, Optional, List
+import tempfile
+from typing import Dict, Any, Optional, List, Mapping, NamedTuple, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # Optional dependency, fall back to the standard library
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_CONFIG = {
@@ -18,10 +25,19 @@ DEFAULT_CONFIG = {
         "nvram_path": "/mnt/nvram",
         "flash_path": "/mnt/flash",
         "local_demo_path": "./config/Demo.dat",
-        "settings_file": "user_settings.ini"
+        "settings_file": "user_settings.ini",
+        "update_state_file": "state/update_hashes.json"
     },
     "winscp": {
-        "dll_path": "lib/WinSCP/WinSCPnet.dll"
+        "dll_path": "lib/WinSCP/WinSCPnet.dll",
+        "raw_session_settings": {
+            "SendBuf": "1048576",
+            "SFTPDownloadQueue": "128",
+            "SFTPUploadQueue": "128",
+            "TcpKeepAlive": "1",
+            "PingType": "1",
+            "PingIntervalSecs": "30"
+        }
     },
     "ui": {
         "window_title": "WinSCP Automation Tool",
@@ -31,57 +47,93 @@ DEFAULT_CONFIG = {
         "confirm_before_reboot": True,
         "backup_before_update": True,
         "verify_after_update": True,
-        "max_transfer_threads": 1
+        "max_transfer_threads": 1,
+        "max_parallel_devices": 8,
+        "update_skip_ttl": 0,
+        "download_logs_as_archive": False,
+        "parallel_nvram_reset": False
     }
 }
 
+def _json_loads(data: bytes) -> Any:
+    """Decode JSON with orjson when it is installed, otherwise with the json module."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj: Any) -> bytes:
+    """Encode JSON with a two-space indent, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+class Device(NamedTuple):
+    """Connection information for a single device from devices.ini."""
+    name: str
+    ip: str
+    username: str
+    password: str
+
 class ConfigManager:
     """
     Centralized configuration manager for the WinSCP Automation Tool.
     Handles loading, saving, and accessing configuration values.
-    """
     
-    _instance = None
+    A single instance is created at import time as ``config_manager``;
+    use that instead of constructing new managers.
+    """
     
-    def __new__(cls):
-        """Singleton pattern to ensure only one config manager exists."""
-        if cls._instance is None:
-            cls._instance = super(ConfigManager, cls).__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+    # Map of environment variable names to the config keys they override
+    _ENV_TO_KEY = {
+        'DOWNLOAD_PATH': 'paths.download_path',
+        'MASTER_PAYLOAD_FOLDER': 'paths.master_payload_folder',
+        'LOG_PATH': 'paths.log_path',
+        'CONFIG_FILE': 'paths.config_file',
+        'NVRAM_PATH': 'paths.nvram_path',
+        'FLASH_PATH': 'paths.flash_path',
+        'LOCAL_DEMO_PATH': 'paths.local_demo_path',
+        'WINSCP_DLL_PATH': 'winscp.dll_path',
+        'WINSCP_MAX_PARALLEL': 'operations.max_parallel_devices',
+        'WINSCP_UPLOAD_STREAMS': 'operations.max_transfer_threads'
+    }
     
     def __init__(self):
-        """Initialize the configuration manager if not already initialized."""
-        if self._initialized:
-            return
-            
+        """Initialize the configuration manager."""
         self.config_path = os.getenv('APP_CONFIG', 'config/app_config.json')
-        self.config = DEFAULT_CONFIG.copy()
+        # Deep copy so merging loaded values never mutates the module defaults
+        self.config = copy.deepcopy(DEFAULT_CONFIG)
         self.user_settings = {}
+        self._user_cp = configparser.ConfigParser()
+        self._user_settings_dirty = False
+        self._flat: Dict[str, Any] = {}
+        self._last_serialized: Optional[bytes] = None
+        self._devices_cache: Optional[Tuple[str, int, List[Device]]] = None
         
         # Load configuration
         self._load_config()
+        self._rebuild_flat_index()
         self._load_user_settings()
         
         # Override with environment variables if present
         self._apply_env_overrides()
         
-        self._initialized = True
         logger.info(f"Configuration manager initialized with config path: {self.config_path}")
     
     def _load_config(self) -> None:
         """Load configuration from the JSON config file."""
         try:
             if os.path.exists(self.config_path):
-                with open(self.config_path, 'r') as f:
-                    loaded_config = json.load(f)
+                with open(self.config_path, 'rb') as f:
+                    data = f.read()
+                    loaded_config = _json_loads(data)
                     # Update the default config with loaded values
                     self._deep_update(self.config, loaded_config)
+                # A later save of an unchanged, complete config can then be skipped
+                self._last_serialized = data
                 logger.info(f"Configuration loaded from {self.config_path}")
             else:
                 logger.info(f"Configuration file {self.config_path} not found. Using defaults.")
                 # Create default config file
-                os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
                 self.save_config()
         except Exception as e:
             logger.error(f"Error loading configuration: {e}")
@@ -90,11 +142,10 @@ class ConfigManager:
         """Load user settings from the settings file."""
         settings_file = self.get('paths.settings_file')
         try:
-            if os.path.exists(settings_file):
-                user_config = configparser.ConfigParser()
-                user_config.read(settings_file)
-                if user_config.has_section("Settings"):
-                    self.user_settings = dict(user_config["Settings"])
+            # read() skips missing files and returns the ones it parsed
+            if self._user_cp.read(settings_file):
+                if self._user_cp.has_section("Settings"):
+                    self.user_settings = dict(self._user_cp["Settings"])
                 logger.info(f"User settings loaded from {settings_file}")
             else:
                 logger.info(f"User settings file {settings_file} not found.")
@@ -103,36 +154,52 @@ class ConfigManager:
     
     def _apply_env_overrides(self) -> None:
         """Apply environment variable overrides to the configuration."""
-        # Map of config keys to environment variable names
-        env_mappings = {
-            'paths.download_path': 'DOWNLOAD_PATH',
-            'paths.master_payload_folder': 'MASTER_PAYLOAD_FOLDER',
-            'paths.log_path': 'LOG_PATH',
-            'paths.config_file': 'CONFIG_FILE',
-            'paths.nvram_path': 'NVRAM_PATH',
-            'paths.flash_path': 'FLASH_PATH',
-            'paths.local_demo_path': 'LOCAL_DEMO_PATH',
-            'winscp.dll_path': 'WINSCP_DLL_PATH'
-        }
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         
-        for config_key, env_var in env_mappings.items():
-            if env_var in os.environ:
-                self.set(config_key, os.environ[env_var])
-                logger.debug(f"Override {config_key} with environment variable {env_var}")
+        # Single sweep over the environment against the reverse mapping
+        for env_var, value in os.environ.items():
+            config_key = self._ENV_TO_KEY.get(env_var)
+            if config_key:
+                self.set(config_key, value)
+                if debug_enabled:
+                    logger.debug(f"Override {config_key} with environment variable {env_var}")
     
     def _deep_update(self, target_dict: Dict, source_dict: Dict) -> None:
         """
-        Recursively update a nested dictionary with values from another dictionary.
+        Update a nested dictionary with values from another dictionary.
+        
+        Nested dictionaries are merged with an explicit stack rather than recursion.
         
         Args:
             target_dict: The dictionary to update
             source_dict: The dictionary with new values
         """
-        for key, value in source_dict.items():
-            if key in target_dict and isinstance(target_dict[key], dict) and isinstance(value, dict):
-                self._deep_update(target_dict[key], value)
-            else:
-                target_dict[key] = value
+        stack = [(target_dict, source_dict)]
+        while stack:
+            target, source = stack.pop()
+            for key, value in source.items():
+                if type(value) is dict and type(target.get(key)) is dict:
+                    stack.append((target[key], value))
+                else:
+                    target[key] = value
+    
+    def _rebuild_flat_index(self) -> None:
+        """
+        Rebuild the flat dot-path index used by get().
+        
+        Every nested key is stored under its dot-notated path, so lookups are a
+        single dictionary access instead of a split and walk of the config tree.
+        """
+        flat = {}
+        stack = [("", self.config)]
+        while stack:
+            prefix, node = stack.pop()
+            for key, value in node.items():
+                path = f"{prefix}{key}"
+                flat[path] = value
+                if isinstance(value, dict):
+                    stack.append((f"{path}.", value))
+        self._flat = flat
     
     def get(self, key_path: str, default: Any = None) -> Any:
         """
@@ -143,18 +210,14 @@ class ConfigManager:
             default: Default value to return if the key is not found
             
         Returns:
-            The configuration value or the default value if not found
+            The configuration value or the default value if not found. Sections
+            and lists are returned as copies; use set() to change them.
         """
-        keys = key_path.split('.')
-        value = self.config
-        
-        # Try to traverse the config dictionary
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return default
-        
+        value = self._flat.get(key_path, default)
+        if isinstance(value, (dict, list)):
+            # The index holds the live nested containers; mutating them would
+            # leave the dot-path entries below them stale
+            return copy.deepcopy(value)
         return value
     
     def set(self, key_path: str, value: Any) -> None:
@@ -176,13 +239,33 @@ class ConfigManager:
         
         # Set the value
         config_ref[keys[-1]] = value
+        self._rebuild_flat_index()
     
     def save_config(self) -> None:
-        """Save the current configuration to the config file."""
+        """
+        Save the current configuration to the config file.
+        
+        The write is skipped when the serialized configuration is identical to
+        the last one saved, and otherwise goes through a temporary file that is
+        atomically moved into place.
+        """
         try:
-            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-            with open(self.config_path, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            serialized = _json_dumps(self.config)
+            if serialized == self._last_serialized:
+                logger.debug(f"Configuration unchanged, skipping save to {self.config_path}")
+                return
+            
+            config_dir = os.path.dirname(self.config_path) or '.'
+            os.makedirs(config_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=config_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(serialized)
+                os.replace(tmp_path, self.config_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._last_serialized = serialized
             logger.info(f"Configuration saved to {self.config_path}")
         except Exception as e:
             logger.error(f"Error saving configuration: {e}")
@@ -200,67 +283,138 @@ class ConfigManager:
         """
         return self.user_settings.get(key, default)
     
-    def save_user_setting(self, key: str, value: str) -> None:
+    def set_user_setting(self, key: str, value: str) -> None:
         """
-        Save a user setting.
+        Update a user setting in memory without writing it to disk.
+        
+        Pending changes are written by flush_user_settings().
         
         Args:
             key: The setting key
-            value: The value to save
+            value: The value to set
         """
         self.user_settings[key] = value
-        settings_file = self.get('paths.settings_file')
+        if not self._user_cp.has_section("Settings"):
+            self._user_cp.add_section("Settings")
+        self._user_cp.set("Settings", key, value)
+        self._user_settings_dirty = True
+    
+    def flush_user_settings(self) -> None:
+        """Write pending user setting changes to the settings file, if there are any."""
+        if not self._user_settings_dirty:
+            return
         
+        settings_file = self.get('paths.settings_file')
         try:
-            config = configparser.ConfigParser()
-            if os.path.exists(settings_file):
-                config.read(settings_file)
-            
-            if not config.has_section("Settings"):
-                config.add_section("Settings")
-            
-            config.set("Settings", key, value)
-            
+            # The parser loaded at startup already mirrors the file, so only write it back
             with open(settings_file, "w") as configfile:
-                config.write(configfile)
-            
-            logger.info(f"User setting {key} saved to {settings_file}")
+                self._user_cp.write(configfile)
+            self._user_settings_dirty = False
+            logger.info(f"User settings saved to {settings_file}")
         except Exception as e:
-            logger.error(f"Error saving user setting: {e}")
+            logger.error(f"Error saving user settings: {e}")
+    
+    def save_user_setting(self, key: str, value: str) -> None:
+        """
+        Save a user setting and write it to the settings file immediately.
+        
+        Args:
+            key: The setting key
+            value: The value to save
+        """
+        self.set_user_setting(key, value)
+        self.flush_user_settings()
     
-    def get_devices(self) -> List[Dict[str, str]]:
+    def get_devices(self) -> List[Device]:
         """
         Load device configurations from the devices.ini file.
         
+        The parsed devices are cached and reused until the file's modification
+        time changes, so repeated calls cost a single stat.
+        
         Returns:
-            A list of dictionaries, each containing connection information for a device
+            A list of Device records, each containing connection information for a device
         """
         config_file = os.path.normpath(self.get('paths.config_file'))
-        logger.debug(f"Loading device configurations from {config_file}")
         
-        if not os.path.exists(config_file):
+        try:
+            mtime = os.stat(config_file).st_mtime_ns
+        except FileNotFoundError:
             logger.error(f"Configuration file '{config_file}' not found.")
             raise FileNotFoundError(f"Configuration file '{config_file}' not found.")
         
+        cached = self._devices_cache
+        if cached is not None and cached[0] == config_file and cached[1] == mtime:
+            return list(cached[2])
+        
+        logger.debug(f"Loading device configurations from {config_file}")
+        devices = self._parse_devices_file(config_file)
+        self._devices_cache = (config_file, mtime, devices)
+        return list(devices)
+    
+    def _parse_devices_file(self, config_file: str) -> List[Device]:
+        """
+        Parse devices.ini into Device records.
+        
+        Every device with missing fields is reported at once instead of one per
+        run, and errors raised by ConfigParser itself (duplicate sections or keys,
+        lines outside a section) are reported as ValueError as well.
+        
+        Args:
+            config_file: Path to the devices.ini file
+            
+        Returns:
+            A list of Device records, each containing connection information for a device
+            
+        Raises:
+            ValueError: If the file cannot be parsed or devices are missing fields
+        """
         config = configparser.ConfigParser()
-        config.read(config_file)
-        devices = []
+        try:
+            with open(config_file, 'r') as f:
+                config.read_file(f, config_file)
+        except configparser.Error as e:
+            message = f"Invalid device configuration in '{config_file}':\n{e}"
+            logger.error(message)
+            raise ValueError(message) from e
         
-        for device in config.sections():
+        devices = []
+        errors = []
+        for name in config.sections():
             try:
-                device_info = {
-                    'name': device,
-                    'ip': config[device]['ip'],
-                    'username': config[device]['username'],
-                    'password': config[device]['password']
-                }
-                devices.append(device_info)
-                logger.debug(f"Loaded device: {device}")
-            except KeyError as e:
-                logger.error(f"Missing required field {e} in device section [{device}]")
-                raise ValueError(f"Missing required field {e} in device section [{device}]")
+                devices.append(self._build_device(name, config[name]))
+            except (ValueError, configparser.Error) as e:
+                errors.append(str(e))
+        
+        if errors:
+            message = f"Invalid device configuration in '{config_file}':\n" + "\n".join(errors)
+            logger.error(message)
+            raise ValueError(message)
         
         return devices
+    
+    def _build_device(self, name: str, fields: Mapping[str, str]) -> Device:
+        """
+        Build a Device record from a parsed section, checking required fields.
+        
+        Args:
+            name: The device section name
+            fields: The section's values, including those inherited from [DEFAULT]
+            
+        Returns:
+            A Device record containing connection information for the device
+            
+        Raises:
+            ValueError: If any required field is missing
+        """
+        missing = [field for field in ('ip', 'username', 'password') if field not in fields]
+        if missing:
+            raise ValueError(
+                f"Missing required field(s) {', '.join(repr(field) for field in missing)} in device section [{name}]"
+            )
+        
+        logger.debug(f"Loaded device: {name}")
+        return Device(name, fields['ip'], fields['username'], fields['password'])
 
 # Create a global instance
 config_manager = ConfigManager()
\ No newline at end of file
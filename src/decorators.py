@@ -4,16 +4,19 @@ import subprocess
 from functools import wraps
 
 def log_function_call(func):
+    # Resolve the logger once at decoration time; %-style arguments let logging
+    # skip formatting args/kwargs when the level is disabled
+    logger = logging.getLogger(func.__module__)
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        logger = logging.getLogger(func.__module__)
-        logger.info(f"Calling function: {func.__name__} with args: {args}, kwargs: {kwargs}")
+        logger.info("Calling function: %s with args: %s, kwargs: %s", func.__name__, args, kwargs)
         try:
             result = func(*args, **kwargs)
-            logger.debug(f"Function {func.__name__} returned: {result}")
+            logger.debug("Function %s returned: %s", func.__name__, result)
             return result
         except Exception as e:
-            logger.error(f"Error in function {func.__name__}: {e}", exc_info=True)
+            logger.error("Error in function %s: %s", func.__name__, e, exc_info=True)
             raise
     return wrapper
 
@@ -23,21 +26,22 @@ class DeviceOperationError(Exception):
 
 # General error handling decorator for device operations
 def handle_operation_errors(func):
+    logger = logging.getLogger(func.__module__)
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        logger = logging.getLogger(func.__module__)
         try:
             return func(*args, **kwargs)
         except FileNotFoundError as e:
-            logger.error(f"File not found during operation: {e}")
+            logger.error("File not found during operation: %s", e)
             raise DeviceOperationError(f"File not found during operation: {e}")
         except ValueError as e:
-            logger.error(f"Invalid value provided: {e}")
+            logger.error("Invalid value provided: %s", e)
             raise DeviceOperationError(f"Invalid value provided: {e}")
         except subprocess.CalledProcessError as e:
-            logger.error(f"Error running external command: {e}")
+            logger.error("Error running external command: %s", e)
             raise DeviceOperationError(f"Error running external command: {e}")
         except Exception as e:
-            logger.error(f"Unexpected error occurred: {e}", exc_info=True)
+            logger.error("Unexpected error occurred: %s", e, exc_info=True)
             raise DeviceOperationError(f"Unexpected error occurred: {e}")
     return wrapper
@@ -1,13 +1,14 @@
 # src/gui.py
 
 import os
+import queue
 import tkinter as tk
-from tkinter import filedialog, messagebox, BooleanVar
+from tkinter import BooleanVar
 import logging
-from tkinter import ttk  # For the progress bar
-from typing import List
+from tkinter import ttk  # Themed widgets and the progress bar
+from typing import Dict, List
 from decorators import log_function_call
-from validation import validate_operations  # Import the validation function
+from validation import validate_operations, OPERATION_RULES
 from config_manager import config_manager
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,19 @@ logger = logging.getLogger(__name__)
 logger.info('Initializing GUI')
 logger.debug('Setting up buttons and event handlers')
 
+# Operation keys and their checkbox labels, in display order. Each key is also
+# the name of the BooleanVar attribute on WinSCPAutomationApp.
+_OP_SCHEMA = (
+    ("compare_file_versions", "Compare File Versions"),
+    ("download_logs", "Download Logs"),
+    ("update_file_versions", "Update File Versions"),
+    ("nvram_reset", "NVRAM Reset"),
+    ("nvram_demo_reset", "NVRAM Demo Reset"),
+)
+
+# Checkbox label by operation key, so messages name operations as the UI does
+_OP_LABELS = dict(_OP_SCHEMA)
+
 
 class WinSCPAutomationApp:
     def __init__(self, root: tk.Tk, operations_callback: callable) -> None:
@@ -33,8 +47,8 @@ class WinSCPAutomationApp:
             config_manager.get('paths.master_payload_folder')
         )
         
-        logger.info(f"Initial download path: {self.download_path}")
-        logger.info(f"Initial master payload folder: {self.master_payload_folder}")
+        logger.info("Initial download path: %s", self.download_path)
+        logger.info("Initial master payload folder: %s", self.master_payload_folder)
 
         # Initialize BooleanVars for operations
         self.download_logs = BooleanVar()
@@ -42,13 +56,16 @@ class WinSCPAutomationApp:
         self.nvram_reset = BooleanVar()
         self.compare_file_versions = BooleanVar()
         self.update_file_versions = BooleanVar()
+        self._op_vars = {key: getattr(self, key) for key, _ in _OP_SCHEMA}
+        # Trace callbacks receive the Tcl variable name; map it back to the operation
+        self._var_keys = {str(var): key for key, var in self._op_vars.items()}
 
         # Add traces to enforce operation rules
-        self.download_logs.trace_add('write', self.on_operation_select)
-        self.nvram_demo_reset.trace_add('write', self.on_operation_select)
-        self.nvram_reset.trace_add('write', self.on_operation_select)
-        self.compare_file_versions.trace_add('write', self.on_operation_select)
-        self.update_file_versions.trace_add('write', self.on_operation_select)
+        for var in self._op_vars.values():
+            var.trace_add('write', self.on_operation_select)
+
+        # Guards on_operation_select against re-entry from its own writes
+        self._in_trace = False
 
         # Custom name variable
         self.custom_name_var = tk.StringVar()
@@ -56,8 +73,13 @@ class WinSCPAutomationApp:
         # Create the layout for better user experience
         self.create_layout()
 
-        # Progress bar for operations (initially hidden)
+        # Progress bar for operations (initially hidden), fed from the worker thread through a queue
         self.progress_bar = None
+        self._progress_queue = queue.Queue()
+        self._progress_job = None
+
+        # Write pending setting changes once when the window closes
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         logger.debug("WinSCPAutomationApp initialized successfully")
 
@@ -77,11 +99,8 @@ class WinSCPAutomationApp:
         operations_frame = tk.Frame(self.root)
         operations_frame.pack(pady=10)
 
-        self.create_checkbox("Compare File Versions", self.compare_file_versions, operations_frame)
-        self.create_checkbox("Download Logs", self.download_logs, operations_frame)
-        self.create_checkbox("Update File Versions", self.update_file_versions, operations_frame)
-        self.create_checkbox("NVRAM Reset", self.nvram_reset, operations_frame)
-        self.create_checkbox("NVRAM Demo Reset", self.nvram_demo_reset, operations_frame)
+        for key, label in _OP_SCHEMA:
+            self.create_checkbox(label, self._op_vars[key], operations_frame)
 
         # Folder selection section
         folder_frame = tk.Frame(self.root)
@@ -121,59 +140,86 @@ class WinSCPAutomationApp:
         self.status_label.pack(fill=tk.X)
 
     @log_function_call
-    def show_progress_bar(self):
+    def show_progress_bar(self, maximum: int):
         """
-        Show the progress bar and start it.
+        Show the progress bar, reset to track the given number of steps.
         """
         if not self.progress_bar:
-            self.progress_bar = ttk.Progressbar(self.root, orient=tk.HORIZONTAL, length=200, mode='indeterminate')
-            self.progress_bar.pack(pady=10)
-        self.progress_bar.start()
+            self.progress_bar = ttk.Progressbar(self.root, orient=tk.HORIZONTAL, length=200, mode='determinate')
+        # Updates left over from a previous run must not overwrite the reset below
+        self._drain_progress_queue()
+        self.progress_bar.config(maximum=maximum, value=0)
+        self.progress_bar.pack(pady=10)
 
     @log_function_call
     def hide_progress_bar(self):
         """
-        Hide the progress bar and stop it.
+        Hide the progress bar.
         """
         if self.progress_bar:
-            self.progress_bar.stop()
             self.progress_bar.pack_forget()  # Hide the progress bar
 
+    def report_progress(self, done: int, total: int, operation_name: str) -> None:
+        """
+        Record that an operation finished. Safe to call from the worker thread;
+        the update is applied on the Tk thread by _poll_progress.
+        """
+        self._progress_queue.put((done, total, operation_name))
+
+    def _drain_progress_queue(self) -> None:
+        """
+        Discard any progress updates that have not been applied yet.
+        """
+        while True:
+            try:
+                self._progress_queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def _poll_progress(self) -> None:
+        """
+        Apply queued progress updates to the progress bar and status label.
+        """
+        while True:
+            try:
+                done, total, operation_name = self._progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.progress_bar.config(value=done)
+            self.update_status(f"Completed '{operation_name}' ({done}/{total})")
+        self._progress_job = self.root.after(100, self._poll_progress)
+
     @log_function_call
     def create_device_selection_buttons(self, parent_frame):
         """
         Create buttons for selecting and deselecting all devices.
         """
-        select_all_button = tk.Button(parent_frame, text="Select All", command=self.select_all_devices)
-        deselect_all_button = tk.Button(parent_frame, text="Deselect All", command=self.deselect_all_devices)
+        select_all_button = ttk.Button(parent_frame, text="Select All", command=self.select_all_devices)
+        deselect_all_button = ttk.Button(parent_frame, text="Deselect All", command=self.deselect_all_devices)
         select_all_button.pack(pady=5, side=tk.LEFT)
         deselect_all_button.pack(pady=5, side=tk.RIGHT)
 
-    @log_function_call
     def select_all_devices(self):
         """
         Select all devices in the listbox.
         """
         self.device_listbox.select_set(0, tk.END)
 
-    @log_function_call
     def deselect_all_devices(self):
         """
         Deselect all devices in the listbox.
         """
         self.device_listbox.select_clear(0, tk.END)
 
-    @log_function_call
     def create_checkbox(self, label: str, var: BooleanVar, parent_frame=None) -> None:
-        chk = tk.Checkbutton(parent_frame or self.root, text=label, variable=var)
+        chk = ttk.Checkbutton(parent_frame or self.root, text=label, variable=var)
         chk.pack(anchor=tk.W)
-        logger.debug(f"Checkbox '{label}' created")
+        logger.debug("Checkbox '%s' created", label)
 
-    @log_function_call
-    def create_button(self, label: str, command: callable, parent_frame=None) -> tk.Button:
-        btn = tk.Button(parent_frame or self.root, text=label, command=command)
+    def create_button(self, label: str, command: callable, parent_frame=None) -> ttk.Button:
+        btn = ttk.Button(parent_frame or self.root, text=label, command=command)
         btn.pack(pady=5)
-        logger.debug(f"Button '{label}' created")
+        logger.debug("Button '%s' created", label)
         return btn
 
     @log_function_call
@@ -184,7 +230,9 @@ class WinSCPAutomationApp:
         scrollbar = tk.Scrollbar(frame)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        self.device_listbox = tk.Listbox(frame, selectmode=tk.MULTIPLE, width=50, height=10, yscrollcommand=scrollbar.set)
+        # The listbox content is bound to a variable so it can be replaced in one Tcl call
+        self._devices_var = tk.StringVar()
+        self.device_listbox = tk.Listbox(frame, listvariable=self._devices_var, selectmode=tk.MULTIPLE, width=50, height=10, yscrollcommand=scrollbar.set)
         self.device_listbox.pack(side=tk.LEFT, fill=tk.BOTH)
 
         scrollbar.config(command=self.device_listbox.yview)
@@ -194,46 +242,61 @@ class WinSCPAutomationApp:
 
     @log_function_call
     def populate_device_list(self, listbox: tk.Listbox) -> None:
-        listbox.delete(0, tk.END)
+        self._devices = []
         
         try:
-            devices = config_manager.get_devices()
-            for device_info in devices:
-                listbox.insert(tk.END, device_info['name'])
+            self._devices = [device_info.name for device_info in config_manager.get_devices()]
         except (FileNotFoundError, ValueError) as e:
-            logger.error(f"Error loading device list: {e}")
+            self._devices_var.set(())
+            logger.error("Error loading device list: %s", e)
+            from tkinter import messagebox
             messagebox.showerror("Error", str(e))
             return
 
-    @log_function_call
+        # Replacing the bound variable swaps the whole list atomically
+        self._devices_var.set(tuple(self._devices))
+
     def get_selected_devices(self) -> List[str]:
         selected_indices = self.device_listbox.curselection()
-        selected_devices = [self.device_listbox.get(i) for i in selected_indices]
+        selected_devices = [self._devices[i] for i in selected_indices]
         return selected_devices
 
     @log_function_call
     def open_config_file(self) -> None:
         config_file = config_manager.get('paths.config_file')
-        if os.path.exists(config_file):
+        try:
             os.startfile(config_file)
-        else:
+        except OSError:
+            from tkinter import messagebox
             messagebox.showerror("Error", f"Configuration file '{config_file}' not found.")
 
     @log_function_call
     def select_download_folder(self) -> None:
+        from tkinter import filedialog
         folder_selected = filedialog.askdirectory(initialdir=self.download_path, title="Select Download Folder")
-        if folder_selected:
-            self.download_path = os.path.normpath(folder_selected)
-            config_manager.save_user_setting("download_path", self.download_path)
-            self.download_folder_label.config(text=f"Download Folder: {self.download_path}")
+        if not folder_selected:
+            return
+        folder_selected = os.path.normpath(folder_selected)
+        # Nothing to save or redraw when the same folder is picked again
+        if folder_selected == self.download_path:
+            return
+        self.download_path = folder_selected
+        config_manager.set_user_setting("download_path", self.download_path)
+        self.download_folder_label.config(text=f"Download Folder: {self.download_path}")
 
     @log_function_call
     def select_master_payload_folder(self) -> None:
+        from tkinter import filedialog
         folder_selected = filedialog.askdirectory(initialdir=self.master_payload_folder, title="Select Master Payload Folder")
-        if folder_selected:
-            self.master_payload_folder = os.path.normpath(folder_selected)
-            config_manager.save_user_setting("master_payload_folder", self.master_payload_folder)
-            self.master_payload_folder_label.config(text=f"Master Payload Folder: {self.master_payload_folder}")
+        if not folder_selected:
+            return
+        folder_selected = os.path.normpath(folder_selected)
+        # Nothing to save or redraw when the same folder is picked again
+        if folder_selected == self.master_payload_folder:
+            return
+        self.master_payload_folder = folder_selected
+        config_manager.set_user_setting("master_payload_folder", self.master_payload_folder)
+        self.master_payload_folder_label.config(text=f"Master Payload Folder: {self.master_payload_folder}")
 
     @log_function_call
     def update_status(self, text: str) -> None:
@@ -243,56 +306,73 @@ class WinSCPAutomationApp:
         self.status_label.config(text=text)
         self.root.update_idletasks()
 
-    @log_function_call
-    def on_operation_select(self, *args):
+    def _snapshot_ops(self) -> Dict[str, bool]:
+        """
+        Read the operation checkboxes into a dict of operation name -> selected.
+        """
+        return {key: var.get() for key, var in self._op_vars.items()}
+
+    def on_operation_select(self, var_name, *args):
         """
         Enforce operation rules when checkboxes are toggled.
         """
-        selected_operations = {
-            "download_logs": self.download_logs.get(),
-            "nvram_demo_reset": self.nvram_demo_reset.get(),
-            "nvram_reset": self.nvram_reset.get(),
-            "compare_file_versions": self.compare_file_versions.get(),
-            "update_file_versions": self.update_file_versions.get()
-        }
+        # Undoing an invalid selection writes to the traced variables again;
+        # ignore those nested notifications instead of re-validating
+        if self._in_trace:
+            return
+        self._in_trace = True
         try:
-            # Validate operations to enforce rules
-            validate_operations(selected_operations)
-        except ValueError as e:
-            # Handle mutual exclusivity
-            if 'nvram_reset' in str(e) or 'nvram_demo_reset' in str(e):
-                # Undo the last change that caused the validation to fail
-                if self.nvram_reset.get() and self.nvram_demo_reset.get():
-                    # Determine which one to uncheck based on the error message
-                    if 'NVRAM Reset' in str(e):
-                        self.nvram_reset.set(False)
-                    else:
-                        self.nvram_demo_reset.set(False)
-            # Enforce dependencies
-            if 'requires' in str(e):
-                # If operation requires another, uncheck it
-                if 'download_logs' in str(e) and self.download_logs.get():
-                    self.download_logs.set(False)
-                if 'update_file_versions' in str(e) and self.update_file_versions.get():
-                    self.update_file_versions.set(False)
-            # Show error message
-            messagebox.showwarning("Invalid Selection", str(e))
+            self._enforce_operation_rules(self._var_keys[var_name])
+        finally:
+            self._in_trace = False
+
+    def _enforce_operation_rules(self, changed_op: str) -> None:
+        """
+        Apply OPERATION_RULES to the operation that was just toggled, undoing
+        selections that would break them.
+        """
+        selected = self._snapshot_ops()
+        rules = OPERATION_RULES[changed_op]
+        message = None
+
+        if selected[changed_op]:
+            # A newly checked operation must not conflict with, or miss, another one
+            conflicts = [op for op in rules['excludes'] if selected[op]]
+            missing = [op for op in rules['requires'] if not selected[op]]
+            if conflicts:
+                self._op_vars[changed_op].set(False)
+                message = (f"Operation '{_OP_LABELS[changed_op]}' cannot be selected with "
+                           f"{', '.join(_OP_LABELS[op] for op in conflicts)}")
+            elif missing:
+                self._op_vars[changed_op].set(False)
+                message = (f"Operation '{_OP_LABELS[changed_op]}' requires "
+                           f"{', '.join(_OP_LABELS[op] for op in missing)} to be selected")
+        else:
+            # Unchecking an operation also unchecks the ones that depend on it
+            dependents = [op for op, op_rules in OPERATION_RULES.items()
+                          if changed_op in op_rules['requires'] and selected[op]]
+            for op in dependents:
+                self._op_vars[op].set(False)
+            if dependents:
+                verb = "requires" if len(dependents) == 1 else "require"
+                message = (f"Deselected {', '.join(_OP_LABELS[op] for op in dependents)}, "
+                           f"which {verb} {_OP_LABELS[changed_op]}")
+
+        if message:
+            from tkinter import messagebox
+            messagebox.showwarning("Invalid Selection", message)
 
     @log_function_call
     def run_operations_clicked(self):
+        from tkinter import messagebox
+
         # Run operations
         selected_devices = self.get_selected_devices()
         if not selected_devices:
             messagebox.showwarning("No Devices Selected", "Please select at least one device.")
             return
 
-        selected_operations = {
-            "download_logs": self.download_logs.get(),
-            "nvram_demo_reset": self.nvram_demo_reset.get(),
-            "nvram_reset": self.nvram_reset.get(),
-            "compare_file_versions": self.compare_file_versions.get(),
-            "update_file_versions": self.update_file_versions.get()
-        }
+        selected_operations = self._snapshot_ops()
 
         if not any(selected_operations.values()):
             messagebox.showwarning("No Operations Selected", "Please select at least one operation.")
@@ -313,8 +393,9 @@ class WinSCPAutomationApp:
 
         # Disable buttons during execution
         self.run_operations_button.config(state=tk.DISABLED, text="Running...")
-        self.show_progress_bar()
+        self.show_progress_bar(sum(selected_operations.values()))
         self.update_status("Starting operations...")
+        self._progress_job = self.root.after(100, self._poll_progress)
 
         # Call the callback function
         self.operations_callback(
@@ -324,13 +405,30 @@ class WinSCPAutomationApp:
             selected_devices,
             custom_name,
             self.on_operations_complete,
-            self.root
+            self.root,
+            self.report_progress
         )
 
+    @log_function_call
+    def on_close(self) -> None:
+        """
+        Flush pending user settings and close the window.
+        """
+        config_manager.flush_user_settings()
+        self.root.destroy()
+
     @log_function_call
     def on_operations_complete(self):
+        config_manager.flush_user_settings()
+
+        if self._progress_job:
+            self.root.after_cancel(self._progress_job)
+            self._progress_job = None
+        self._drain_progress_queue()
+
         # Re-enable the button when the operation is done
         self.run_operations_button.config(state=tk.NORMAL, text="Run Operations")
         self.hide_progress_bar()
         self.update_status("Ready")
+        from tkinter import messagebox
         messagebox.showinfo("Operations Complete", "Selected operations have completed.")
\ No newline at end of file
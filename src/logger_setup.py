@@ -1,27 +1,74 @@
 # src/logger_setup.py
 
 import os
+import time
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+# Listener draining the log queue into the real handlers, see setup_logger()
+_listener = None
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class CachedTimeFormatter(logging.Formatter):
+    """
+    Formatter that reuses the formatted timestamp for records in the same second.
+    
+    Only the millisecond suffix is computed per record; localtime/strftime run
+    once per second instead of once per record. When the format is LOG_FORMAT,
+    the message is assembled with a precompiled f-string instead of %-style
+    interpolation; other formats use the standard logging path.
+    """
+    
+    def __init__(self, fmt=None, datefmt=None, style='%', *args, **kwargs):
+        super().__init__(fmt, datefmt, style, *args, **kwargs)
+        # (second, formatted string) kept as one tuple so threads never see a torn pair
+        self._cached_time = (None, '')
+        self._use_fast_format = (fmt == LOG_FORMAT and style == '%')
+    
+    def formatMessage(self, record):
+        if self._use_fast_format:
+            return f"{record.asctime} - {record.name} - {record.levelname} - {record.message}"
+        return super().formatMessage(record)
+    
+    def formatTime(self, record, datefmt=None):
+        sec = int(record.created)
+        cached_sec, cached_str = self._cached_time
+        if sec != cached_sec:
+            ct = self.converter(sec)
+            cached_str = time.strftime(datefmt or self.default_time_format, ct)
+            self._cached_time = (sec, cached_str)
+        if datefmt:
+            return cached_str
+        return self.default_msec_format % (cached_str, record.msecs)
 
 def setup_logger(log_file='logs/debug.log', level=logging.DEBUG):
     """
     Set up the root logger with file and console handlers.
     
+    Calling it again once logging is configured does nothing; use
+    reset_logger() first to reconfigure with different settings.
+    
     :param log_file: Path to the log file
     :param level: Minimum logging level
     :return: None
     """
+    global _listener
+    if _listener is not None:
+        return
+    
     # Create logs directory if it doesn't exist
     log_dir = os.path.dirname(log_file)
-    if log_dir and not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
     
     # Configure the root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
     
-    # Remove any existing handlers to avoid duplicates
+    # Remove any handlers configured elsewhere to avoid duplicates
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
     
@@ -35,12 +82,41 @@ def setup_logger(log_file='logs/debug.log', level=logging.DEBUG):
     console_handler.setLevel(logging.INFO)  # Less verbose for console output
     
     # Create formatter and add it to both handlers
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    formatter = CachedTimeFormatter(LOG_FORMAT)
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
     
-    # Add the handlers to the root logger
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    # Log calls only enqueue the record; a listener thread does the formatting
+    # and file/console I/O so worker and Tk threads never block on disk
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
     
-    logging.info("Logger initialized")
\ No newline at end of file
+    logging.info("Logger initialized")
+
+def stop_logger():
+    """
+    Stop the background log listener, writing out any queued records.
+    
+    :return: None
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+def reset_logger():
+    """
+    Tear down the logging set up by setup_logger() so it can be configured again.
+    
+    :return: None
+    """
+    stop_logger()
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+
+atexit.register(stop_logger)
\ No newline at end of file
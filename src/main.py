@@ -3,25 +3,20 @@
 import os
 import logging
 import tkinter as tk
+import queue
 import threading
+from functools import lru_cache
 from typing import List, Dict, Callable
-from dotenv import load_dotenv
 from gui import WinSCPAutomationApp
-from operations import (
-    download_logs,
-    compare_file_versions,
-    update_file_versions,
-    nvram_demo_reset,
-    nvram_reset,
-)
 from logger_setup import setup_logger
 from decorators import log_function_call
-from tkinter import messagebox
 from validation import validate_operations, OPERATION_RULES
 from config_manager import config_manager
 
-# Ensure environment variables are loaded
-load_dotenv()
+# Ensure environment variables are loaded, unless the caller opted out
+if not os.environ.get('SKIP_DOTENV'):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # Set up the root logger
 log_path = config_manager.get('paths.log_path')
@@ -29,10 +24,77 @@ setup_logger(log_file=log_path)
 
 logger = logging.getLogger(__name__)
 
+# Configuration is loaded once at startup and not changed while the app runs
+_NVRAM_PATH = config_manager.get('paths.nvram_path')
+
+# Operation names in execution order; the rules are static, so sort them once
+_OP_ORDER = tuple(op for op, _ in sorted(OPERATION_RULES.items(), key=lambda kv: kv[1]['order']))
+
 logger.debug('Application started')
 logger.info('Loading GUI components')
 
 
+@lru_cache(maxsize=None)
+def get_dispatch() -> Dict[str, Callable[[List[str], str, str, str, str], None]]:
+    """
+    Returns the table mapping each operation name to a callable taking
+    (selected_devices, download_path, master_payload_folder, nvram_path, custom_name).
+
+    The operations module loads the WinSCP .NET assembly, so it is imported on
+    the first run instead of at startup to keep the first window paint fast.
+    """
+    from operations import (
+        download_logs,
+        compare_file_versions,
+        update_file_versions,
+        nvram_demo_reset,
+        nvram_reset,
+    )
+
+    return {
+        'compare_file_versions': lambda devs, dl, mpf, nv, cn: compare_file_versions(devs, mpf),
+        'download_logs': lambda devs, dl, mpf, nv, cn: download_logs(devs, dl, cn),
+        'update_file_versions': lambda devs, dl, mpf, nv, cn: update_file_versions(devs, mpf),
+        'nvram_reset': lambda devs, dl, mpf, nv, cn: nvram_reset(nv, devs),
+        'nvram_demo_reset': lambda devs, dl, mpf, nv, cn: nvram_demo_reset(nv, devs),
+    }
+
+
+def _worker_loop(work_queue: "queue.Queue[Callable[[], None]]") -> None:
+    """
+    Runs queued operation batches one at a time for the lifetime of the application.
+
+    :param work_queue: Queue of callables to execute.
+    """
+    while True:
+        job = work_queue.get()
+        try:
+            job()
+        except Exception:
+            logger.exception("Unhandled error in operation worker")
+        finally:
+            work_queue.task_done()
+
+
+# Operation batches run on one persistent background thread, in submission order
+_work_queue: "queue.Queue[Callable[[], None]]" = queue.Queue()
+threading.Thread(target=_worker_loop, args=(_work_queue,), name="operations-worker", daemon=True).start()
+
+
+def _schedule_error(root: tk.Tk, on_complete: Callable, title: str, message: str) -> None:
+    """
+    Shows an error dialog on the Tk main thread, then calls on_complete.
+
+    :param root: Tk root used to schedule the dialog.
+    :param on_complete: Callback run after the dialog is dismissed.
+    :param title: Dialog title.
+    :param message: Error message to display.
+    """
+    from tkinter import messagebox
+
+    root.after(0, lambda: (messagebox.showerror(title, message), on_complete()))
+
+
 @log_function_call
 def run_operations(
     selected_operations: Dict[str, bool],
@@ -42,53 +104,54 @@ def run_operations(
     custom_name: str,
     on_complete: Callable = None,
     root: tk.Tk = None,
+    on_progress: Callable[[int, int, str], None] = None,
 ) -> None:
     """
     Runs selected operations based on the user's choice in a separate thread.
+
+    on_progress, if given, is called from the worker thread after each operation
+    with (completed count, total count, operation name).
     """
+    from tkinter import messagebox
+
     logger.info("Preparing to run selected operations")
 
     # Validate the selected operations
     try:
         validate_operations(selected_operations)
     except ValueError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         if on_complete and root:
-            def show_error(e=e):
-                messagebox.showerror("Validation Error", str(e))
-                on_complete()
-            root.after(0, show_error)
+            _schedule_error(root, on_complete, "Validation Error", str(e))
         return
 
     def execute_operations():
         logger.info("Running selected operations")
-        nvram_path = config_manager.get('paths.nvram_path')
 
-        # Sort operations based on their defined order
-        selected_ops = [op for op, selected in selected_operations.items() if selected]
-        ordered_ops = sorted(selected_ops, key=lambda op: OPERATION_RULES[op]['order'])
+        # Selected operations in their defined order
+        ordered_ops = [op for op in _OP_ORDER if selected_operations.get(op)]
 
         try:
-            for op in ordered_ops:
+            dispatch = get_dispatch()
+            for index, op in enumerate(ordered_ops, start=1):
                 # Before starting each operation, prompt the user
                 operation_name = op.replace('_', ' ').title()
 
-                # Use an event to wait for the user's decision
+                # Use an event to wait for the user's decision, which the
+                # prompt stores in result_holder before setting the event
                 proceed_event = threading.Event()
+                result_holder = []
 
                 def prompt_user():
                     result = messagebox.askyesno(
                         "Next Operation",
                         f"The next operation is '{operation_name}'.\nDo you want to continue?"
                     )
-                    if result:
-                        proceed_event.set()
-                    else:
+                    result_holder.append(result)
+                    if not result and on_complete:
                         # User chose to abort
-                        if on_complete:
-                            on_complete()
-                        proceed_event.set()
-                        return
+                        on_complete()
+                    proceed_event.set()
 
                 # Show the prompt in the main thread
                 root.after(0, prompt_user)
@@ -96,40 +159,35 @@ def run_operations(
                 # Wait until the user makes a decision
                 proceed_event.wait()
 
-                if not proceed_event.is_set():
+                if not result_holder[0]:
                     # User aborted
-                    logger.info(f"Operation '{operation_name}' was aborted by the user.")
+                    logger.info("Operation '%s' was aborted by the user.", operation_name)
                     return
 
-                logger.info(f"Starting operation '{operation_name}'")
+                logger.info("Starting operation '%s'", operation_name)
 
                 # Execute the operation on all selected devices
-                if op == 'compare_file_versions':
-                    compare_file_versions(selected_devices, master_payload_folder)
-                elif op == 'download_logs':
-                    download_logs(selected_devices, download_path, custom_name)
-                elif op == 'update_file_versions':
-                    update_file_versions(selected_devices, master_payload_folder)
-                elif op == 'nvram_reset':
-                    nvram_reset(nvram_path, selected_devices)
-                elif op == 'nvram_demo_reset':
-                    nvram_demo_reset(nvram_path, selected_devices)
+                dispatch[op](selected_devices, download_path, master_payload_folder, _NVRAM_PATH, custom_name)
+
+                if on_progress:
+                    on_progress(index, len(ordered_ops), operation_name)
 
             # All operations completed
             if on_complete and root:
                 root.after(0, on_complete)
 
         except Exception as e:
-            logger.error(f"Error during operations: {e}", exc_info=True)
+            logger.error("Error during operations: %s", e, exc_info=True)
             if on_complete and root:
-                def show_error(e=e):
-                    messagebox.showerror("Error", f"An error occurred during operations:\n{e}")
-                    on_complete()
-                root.after(0, show_error)
+                _schedule_error(root, on_complete, "Error", f"An error occurred during operations:\n{e}")
             return
+        finally:
+            # Device connections are shared by the operations of one run only
+            from operations import session_pool
+            session_pool.close_all()
 
-    operation_thread = threading.Thread(target=execute_operations)
-    operation_thread.start()
+    # Hand the batch to the long-lived worker thread
+    _work_queue.put(execute_operations)
 
 
 @log_function_call
@@ -1,64 +1,277 @@
 # src/operations.py
-import clr
+from __future__ import annotations
+
 import os
+import json
+import atexit
+import posixpath
+import time
+import shlex
+import shutil
+import tarfile
+import hashlib
 import logging
-from typing import List, Dict, Optional
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Sequence, Tuple, TypeVar
 from datetime import datetime
-from config_manager import config_manager
-
-# Initialize .NET Interop with pythonnet
-winscp_dll_path = os.path.abspath(config_manager.get('winscp.dll_path'))
-clr.AddReference(winscp_dll_path)
-from WinSCP import Session, SessionOptions, Protocol, TransferOptions, TransferOperationResult, TransferMode
+from config_manager import config_manager, Device
 
 logger = logging.getLogger(__name__)
 
-def create_session(device: Dict[str, str]) -> Optional[Session]:
+# WinSCP .NET types, bound by load_winscp() on first use
+Session = SessionOptions = Protocol = TransferOptions = TransferOperationResult = TransferMode = None
+_winscp_lock = threading.Lock()
+
+def load_winscp() -> None:
+    """
+    Loads the WinSCP .NET assembly through pythonnet and binds its types in this module.
+
+    Starting the CLR and loading the DLL is slow, so it is done on the first
+    session or transfer instead of at import time. Safe to call from several threads.
+    """
+    global Session, SessionOptions, Protocol, TransferOptions, TransferOperationResult, TransferMode
+    if Session is not None:
+        return
+    with _winscp_lock:
+        if Session is not None:
+            return
+        # Initialize .NET Interop with pythonnet
+        import clr
+        winscp_dll_path = os.path.abspath(config_manager.get('winscp.dll_path'))
+        clr.AddReference(winscp_dll_path)
+        from WinSCP import SessionOptions, Protocol, TransferOptions, TransferOperationResult, TransferMode
+        # Session is bound last: it is the flag checked above
+        from WinSCP import Session
+
+T = TypeVar('T')
+
+# Configuration is loaded once at startup and not changed while the app runs,
+# so the remote paths and session settings are resolved once here
+_FLASH_PATH = config_manager.get('paths.flash_path')
+_NVRAM_PATH = config_manager.get('paths.nvram_path')
+_LOCAL_DEMO_PATH = os.path.abspath(config_manager.get('paths.local_demo_path'))
+_RAW_SESSION_SETTINGS = [
+    (name, str(value))
+    for name, value in config_manager.get('winscp.raw_session_settings', {}).items()
+]
+
+# Payload file types kept in the flash directory
+PAYLOAD_EXTENSIONS = ('.iso', '.sig')
+
+# Remote log locations downloaded by download_logs
+LOG_SOURCES = ("/tmp/logs/*", "/mnt/log/*")
+
+# Remote directory listings for each open session: id(session) -> {remote path: (fetched at, files)}.
+# Entries are dropped when the session is closed or the directory is modified,
+# and expire after LISTING_TTL seconds in case the device changes them itself.
+LISTING_TTL = 30.0
+_listing_cache: Dict[int, Dict[str, Tuple[float, list]]] = {}
+
+def create_session(device: Device) -> Optional[Session]:
     """
     Creates and opens a WinSCP session using the provided device credentials.
 
-    :param device: A dictionary containing device connection information with keys:
-        - 'name': Name of the device.
-        - 'ip': IP address of the device.
-        - 'username': Username for authentication.
-        - 'password': Password for authentication.
+    :param device: A Device record containing connection information:
+        - name: Name of the device.
+        - ip: IP address of the device.
+        - username: Username for authentication.
+        - password: Password for authentication.
     :return: An active WinSCP session if successful, or None if the session creation fails.
     """
+    load_winscp()
     try:
         session = Session()
         session_options = SessionOptions()
         session_options.Protocol = Protocol.Sftp
-        session_options.HostName = device['ip']
-        session_options.UserName = device['username']
-        session_options.Password = device['password']
+        session_options.HostName = device.ip
+        session_options.UserName = device.username
+        session_options.Password = device.password
         session_options.GiveUpSecurityAndAcceptAnySshHostKey = True
+        # Raw settings (e.g. a larger socket send buffer) tune SFTP on high-latency links
+        for name, value in _RAW_SESSION_SETTINGS:
+            session_options.AddRawSettings(name, value)
        
-        logger.info(f"Opening WinSCP session for {device['name']}...")
+        logger.info(f"Opening WinSCP session for {device.name}...")
         session.Open(session_options)
         return session
     except Exception as e:
-        logger.error(f"Failed to create session for {device['name']} - {e}")
+        logger.error(f"Failed to create session for {device.name} - {e}")
         return None
 
+def close_session(session: Session) -> None:
+    """
+    Disposes of a WinSCP session and drops its cached directory listings.
+
+    :param session: The session to close.
+    """
+    _listing_cache.pop(id(session), None)
+    session.Dispose()
+
+class SessionPool:
+    """
+    Keeps one open WinSCP session per device, so consecutive operations in a run
+    reuse the connection instead of repeating the SSH handshake.
+
+    Each device's session is used by one thread at a time: operations process a
+    device in a single task and run one after another.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+
+    def get(self, device: Device) -> Optional[Session]:
+        """
+        Returns the open session for a device, connecting if there is none.
+
+        :param device: The device to connect to.
+        :return: An open session, or None if the connection fails.
+        """
+        with self._lock:
+            session = self._sessions.get(device.name)
+        if session is not None:
+            if session.Opened:
+                return session
+            self.discard(device)
+
+        session = create_session(device)
+        if session:
+            with self._lock:
+                self._sessions[device.name] = session
+        return session
+
+    def discard(self, device: Device) -> None:
+        """
+        Closes and forgets the session for a device, if any.
+
+        :param device: The device whose session should be closed.
+        """
+        with self._lock:
+            session = self._sessions.pop(device.name, None)
+        if session is not None:
+            close_session(session)
+
+    def close_all(self) -> None:
+        """Closes every pooled session."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            close_session(session)
+
+# Sessions shared by the operations of a run; main closes them when the run ends
+session_pool = SessionPool()
+atexit.register(session_pool.close_all)
+
+def list_remote_files(session: Session, remote_path: str, ttl: float = LISTING_TTL) -> list:
+    """
+    Lists a remote directory, reusing a recent listing already fetched through this session.
+
+    :param session: Active WinSCP session for the device.
+    :param remote_path: Remote directory to list.
+    :param ttl: Maximum age in seconds of a cached listing before it is fetched again.
+    :return: The RemoteFileInfo entries of the directory.
+    """
+    listings = _listing_cache.setdefault(id(session), {})
+    now = time.monotonic()
+    cached = listings.get(remote_path)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+    files = list(session.ListDirectory(remote_path).Files)
+    listings[remote_path] = (now, files)
+    return files
+
+def invalidate_remote_listing(session: Session, remote_path: str) -> None:
+    """
+    Forgets the cached listing of a remote directory after it has been modified.
+
+    :param session: Active WinSCP session for the device.
+    :param remote_path: Remote directory that changed.
+    """
+    _listing_cache.get(id(session), {}).pop(remote_path, None)
+
+def remove_remote_files(session: Session, remote_path: str, file_names: List[str]) -> None:
+    """
+    Deletes several entries of one remote directory with a single shell command.
+
+    WinSCP's RemoveFiles takes one path (or wildcard) per call, which costs a
+    round trip per file; a single ``rm`` removes the whole batch at once.
+
+    :param session: Active WinSCP session for the device.
+    :param remote_path: Remote directory containing the entries.
+    :param file_names: Names of the files or directories to delete.
+    """
+    if not file_names:
+        return
+    targets = " ".join(shlex.quote(posixpath.join(remote_path, name)) for name in file_names)
+    session.ExecuteCommand(f"rm -rf -- {targets}").Check()
+    invalidate_remote_listing(session, remote_path)
+
 def get_transfer_options() -> TransferOptions:
     """
     Creates and returns a TransferOptions object with predefined settings.
     """
+    load_winscp()
     transfer_options = TransferOptions()
     transfer_options.TransferMode = TransferMode.Binary
     transfer_options.PreserveDirectories = True
     transfer_options.SpeedLimit = 0
     return transfer_options
 
-def get_devices_to_process(selected_devices: List[str]) -> List[Dict[str, str]]:
+def get_devices_to_process(selected_devices: List[str]) -> List[Device]:
     """
     Filters the devices based on the selected device names.
 
     :param selected_devices: List of device names chosen for processing.
-    :return: A list of device dictionaries containing connection information for each selected device.
+    :return: A list of Device records containing connection information for each selected device.
     """
+    # devices.ini is parsed once and cached by config_manager until it changes;
+    # a set makes the name filter a single hash lookup per device
     devices = config_manager.get_devices()
-    return [device for device in devices if device['name'] in selected_devices]
+    selected = set(selected_devices)
+    return [device for device in devices if device.name in selected]
+
+def get_positive_int_setting(key_path: str, default: int, minimum: int = 1) -> int:
+    """
+    Reads an integer setting that must be at least the given minimum.
+
+    :param key_path: Dot-notated configuration key.
+    :param default: Value used when the setting is missing or invalid.
+    :param minimum: Smallest accepted value; lower values are raised to it.
+    :return: The configured value, at least minimum.
+    """
+    try:
+        return max(minimum, int(config_manager.get(key_path, default)))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid {key_path} setting, using {default}")
+        return default
+
+def get_max_parallel_devices() -> int:
+    """
+    Returns the maximum number of devices processed concurrently.
+
+    :return: The 'operations.max_parallel_devices' setting (WINSCP_MAX_PARALLEL), at least 1.
+    """
+    return get_positive_int_setting('operations.max_parallel_devices', 8)
+
+def run_for_devices(worker: Callable[[Device], T], devices: List[Device]) -> List[T]:
+    """
+    Runs a per-device worker for every device, with the devices processed concurrently.
+
+    Each worker opens its own WinSCP session, so the total time is bounded by the
+    slowest device rather than the sum of all of them.
+
+    :param worker: Callable processing a single device; it is expected to handle its own errors.
+    :param devices: Devices to process.
+    :return: The worker results, in the same order as devices.
+    """
+    if len(devices) <= 1:
+        return [worker(device) for device in devices]
+
+    with ThreadPoolExecutor(max_workers=min(len(devices), get_max_parallel_devices())) as executor:
+        return list(executor.map(worker, devices))
 
 def sanitize_folder_name(name: str) -> str:
     """
@@ -72,6 +285,17 @@ def sanitize_folder_name(name: str) -> str:
     sanitized_name = re.sub(invalid_chars, '_', name)
     return sanitized_name
 
+def list_master_files(master_payload_folder: str, extensions: Tuple[str, ...]) -> Dict[str, str]:
+    """
+    Lists the master payload files with the given extensions in a single directory scan.
+
+    :param master_payload_folder: Path to the local folder containing the latest files.
+    :param extensions: File extensions to include, e.g. ('.iso', '.sig').
+    :return: A dictionary mapping file names to their local paths.
+    """
+    with os.scandir(master_payload_folder) as entries:
+        return {entry.name: entry.path for entry in entries if entry.name.endswith(extensions)}
+
 def download_logs(selected_devices: List[str], base_download_path: str, custom_name: Optional[str] = None) -> bool:
     """
     Downloads logs from selected devices to a specified local folder, preserving the subfolder structure.
@@ -100,43 +324,133 @@ def download_logs(selected_devices: List[str], base_download_path: str, custom_n
     logger.info(f"Created parent folder: {parent_folder_path}")
 
     devices_to_process = get_devices_to_process(selected_devices)
-    success = True
 
-    for device in devices_to_process:
-        session = create_session(device)
-        if not session:
-            continue
+    # Get the predefined transfer options, shared by all devices
+    transfer_options = get_transfer_options()
 
-        try:
-            # Create a dedicated download folder for each device inside the parent folder
-            device_download_folder = os.path.join(parent_folder_path, device['name'])
-            os.makedirs(device_download_folder, exist_ok=True)
+    results = run_for_devices(
+        lambda device: download_device_logs(device, parent_folder_path, transfer_options), devices_to_process
+    )
+    return all(results)
 
-            logger.info(f"Downloading logs for device: {device['name']} into {device_download_folder}")
+def download_device_logs(device: Device, parent_folder_path: str, transfer_options: TransferOptions) -> bool:
+    """
+    Downloads logs from a single device into its own folder inside the parent folder.
 
-            # Get the predefined transfer options
-            transfer_options = get_transfer_options()
+    :param device: The device to download logs from.
+    :param parent_folder_path: Path to the local parent folder for this download run.
+    :param transfer_options: Transfer options used for the downloads.
+    :return: False if an error occurred while downloading, True otherwise
+        (including when the session could not be opened, which create_session logs).
+    """
+    session = session_pool.get(device)
+    if not session:
+        return True
 
-            # Download logs from /tmp/logs/ with subfolder structure preserved
-            result: TransferOperationResult = session.GetFiles("/tmp/logs/*", device_download_folder + "\\*", False, transfer_options)
-            result.Check()
+    try:
+        # Create a dedicated download folder for each device inside the parent folder
+        device_download_folder = os.path.join(parent_folder_path, device.name)
+        os.makedirs(device_download_folder, exist_ok=True)
+
+        logger.info(f"Downloading logs for device: {device.name} into {device_download_folder}")
+
+        # Download logs from /tmp/logs/ and /mnt/log/ with subfolder structure preserved,
+        # as one archive when enabled and falling back to per-file transfers otherwise
+        if not (
+            config_manager.get('operations.download_logs_as_archive', False)
+            and get_files_as_archive(device, session, LOG_SOURCES, device_download_folder, transfer_options)
+        ):
+            get_files(session, LOG_SOURCES, os.path.join(device_download_folder, "*"), transfer_options)
+            
+        logger.info(f"Successfully downloaded logs for {device.name}")
 
-            # Download logs from /mnt/log/ with subfolder structure preserved        
-            result: TransferOperationResult = session.GetFiles("/mnt/log/*", device_download_folder + "\\*", False, transfer_options)
-            result.Check()
-                
-            logger.info(f"Successfully downloaded logs for {device['name']}")
+        # Call log_file_versions to get the list of .iso files and write to "PAYLOAD.txt" in device_download_folder
+        log_file_versions(session, device_download_folder)
+        return True
 
-            # Call log_file_versions to get the list of .iso files and write to "PAYLOAD.txt" in device_download_folder
-            log_file_versions(session, device_download_folder)
+    except Exception as e:
+        logger.error(f"Error downloading logs for {device.name}: {e}")
+        # The session may be broken; the next operation reconnects
+        session_pool.discard(device)
+        return False
+
+def get_files_as_archive(device: Device, session: Session, remote_paths: Sequence[str], local_folder: str, transfer_options: TransferOptions) -> bool:
+    """
+    Downloads the contents of several remote directories as a single tar.gz stream.
 
+    The directories are archived on the device, the archive is fetched with one
+    transfer and extracted into local_folder, merging the directories in order as
+    get_files() does. Many small log files then cost one transfer instead of an
+    open/read/close round trip each.
+
+    :param device: The device to download from.
+    :param session: Active WinSCP session for the device.
+    :param remote_paths: Remote directory wildcards, e.g. "/tmp/logs/*".
+    :param local_folder: Local folder receiving the directory contents.
+    :param transfer_options: Transfer options used for the download.
+    :return: True if the archive was downloaded and extracted, False if the caller
+        should fall back to get_files() (e.g. tar is missing on the device).
+    """
+    if not hasattr(tarfile, 'data_filter'):
+        # Without extraction filters a device-built archive could write outside local_folder
+        logger.info(f"Safe archive extraction is not available in this Python, transferring files from {device.name} individually")
+        return False
+
+    # Archive relative to / so the layout is the same with GNU tar and BusyBox
+    remote_dirs = [posixpath.dirname(remote_path).lstrip('/') for remote_path in remote_paths]
+    remote_archive = f"/tmp/winscp_logs_{os.getpid()}_{threading.get_ident()}.tar.gz"
+    quoted_archive = shlex.quote(remote_archive)
+    local_archive = os.path.join(local_folder, os.path.basename(remote_archive))
+    extract_dir = tempfile.mkdtemp(dir=local_folder)
+
+    try:
+        result = session.ExecuteCommand(
+            f"tar -czf {quoted_archive} -C / " + " ".join(shlex.quote(d) for d in remote_dirs)
+        )
+        if result.ExitCode != 0:
+            logger.info(f"Archive download unavailable for {device.name}, transferring files individually: {result.ErrorOutput}")
+            return False
+
+        session.GetFiles(remote_archive, local_archive, False, transfer_options).Check()
+        with tarfile.open(local_archive, 'r:gz') as archive:
+            try:
+                archive.extractall(extract_dir, filter='data')
+            except tarfile.FilterError as e:
+                # e.g. absolute symlinks or device files in the log tree
+                logger.info(f"Archive from {device.name} has entries that cannot be extracted safely, transferring files individually: {e}")
+                return False
+
+        # Later directories overwrite earlier ones, matching the GetFiles order
+        for remote_dir in remote_dirs:
+            extracted = os.path.join(extract_dir, *remote_dir.split('/'))
+            if os.path.isdir(extracted):
+                shutil.copytree(extracted, local_folder, dirs_exist_ok=True)
+        return True
+    finally:
+        try:
+            session.ExecuteCommand(f"rm -f {quoted_archive}")
         except Exception as e:
-            success = False
-            logger.error(f"Error downloading logs for {device['name']}: {e}")
-        finally:
-            session.Dispose()
+            logger.warning(f"Failed to remove {remote_archive} from {device.name}: {e}")
+        if os.path.exists(local_archive):
+            os.remove(local_archive)
+        shutil.rmtree(extract_dir, ignore_errors=True)
+
+def get_files(session: Session, remote_paths: Sequence[str], local_path: str, transfer_options: TransferOptions) -> None:
+    """
+    Downloads several remote paths to one local destination, one after another.
 
-    return success
+    WinSCP's GetFiles takes a single source per call. The sources are fetched in
+    order on the same session, so when two of them contain a file with the same
+    relative path, the later source wins.
+
+    :param session: Active WinSCP session for the device.
+    :param remote_paths: Remote paths (with wildcards) to download.
+    :param local_path: Local destination path mask.
+    :param transfer_options: Transfer options used for the downloads.
+    """
+    for remote_path in remote_paths:
+        result: TransferOperationResult = session.GetFiles(remote_path, local_path, False, transfer_options)
+        result.Check()
 
 def log_file_versions(session: Session, device_download_folder: str) -> None:
     """
@@ -146,20 +460,19 @@ def log_file_versions(session: Session, device_download_folder: str) -> None:
     :param device_download_folder: Path to the local directory where the "PAYLOAD.txt" file should be saved.
     :return: None
     """
-    flash_path = config_manager.get('paths.flash_path')
+    flash_path = _FLASH_PATH
 
     try:
-        remote_files = session.ListDirectory(flash_path).Files
+        remote_files = list_remote_files(session, flash_path)
         # Include both .iso and .sig files
-        iso_sig_files = [file.Name for file in remote_files if file.Name.endswith('.iso') or file.Name.endswith('.sig')]
+        iso_sig_files = [file.Name for file in remote_files if file.Name.endswith(PAYLOAD_EXTENSIONS)]
         # Sort the file names alphabetically
         iso_sig_files.sort()
 
         # Write the sorted list to a file named "PAYLOAD.txt" in device_download_folder
         payload_file_path = os.path.join(device_download_folder, "PAYLOAD.txt")
         with open(payload_file_path, 'w') as payload_file:
-            for file_name in iso_sig_files:
-                payload_file.write(file_name + '\n')
+            payload_file.write(''.join(file_name + '\n' for file_name in iso_sig_files))
 
         logger.info(f"PAYLOAD.txt file written to {payload_file_path}")
     except Exception as e:
@@ -173,33 +486,44 @@ def compare_file_versions(selected_devices: List[str], master_payload_folder: st
     :param master_payload_folder: Path to the local folder containing the latest .iso files.
     :return: None
     """
-    flash_path = config_manager.get('paths.flash_path')
+    flash_path = _FLASH_PATH
     devices_to_process = get_devices_to_process(selected_devices)
     outdated_files_info = {}
 
-    master_files = {
-        file: os.path.join(master_payload_folder, file)
-        for file in os.listdir(master_payload_folder) if file.endswith('.iso')
-    }
+    master_files = list_master_files(master_payload_folder, ('.iso',))
 
-    for device in devices_to_process:
-        session = create_session(device)
-        if not session:
-            continue
+    results = run_for_devices(
+        lambda device: find_outdated_files(device, flash_path, master_files), devices_to_process
+    )
+    for device, outdated_files in zip(devices_to_process, results):
+        if outdated_files:
+            outdated_files_info[device.name] = outdated_files
 
-        try:
-            remote_files = session.ListDirectory(flash_path).Files
-            device_files = [file.Name for file in remote_files if file.Name.endswith('.iso')]
+    display_outdated_files_to_user(outdated_files_info, master_files)
 
-            outdated_files = [file for file in device_files if file not in master_files]
-            if outdated_files:
-                outdated_files_info[device['name']] = outdated_files
-        except Exception as e:
-            logger.error(f"Error comparing files for {device['name']}: {e}")
-        finally:
-            session.Dispose()
+def find_outdated_files(device: Device, flash_path: str, master_files: Dict[str, str]) -> List[str]:
+    """
+    Lists the .iso files on a device that are not present in the master payload.
 
-    display_outdated_files_to_user(outdated_files_info, master_files)
+    :param device: The device to inspect.
+    :param flash_path: Remote path holding the .iso files.
+    :param master_files: A dictionary of master .iso file names to local paths.
+    :return: The outdated file names; empty if none were found or the device could not be read.
+    """
+    session = session_pool.get(device)
+    if not session:
+        return []
+
+    try:
+        remote_files = list_remote_files(session, flash_path)
+        device_files = {file.Name for file in remote_files if file.Name.endswith('.iso')}
+
+        return sorted(device_files - master_files.keys())
+    except Exception as e:
+        logger.error(f"Error comparing files for {device.name}: {e}")
+        # The session may be broken; the next operation reconnects
+        session_pool.discard(device)
+        return []
 
 def remount_flash_as_rw(session: Session) -> None:
     """
@@ -207,7 +531,7 @@ def remount_flash_as_rw(session: Session) -> None:
 
     :param session: Active WinSCP session to execute the remount command.
     """
-    flash_path = config_manager.get('paths.flash_path')
+    flash_path = _FLASH_PATH
     try:
         logger.info(f"Remounting {flash_path} as read-write")
         session.ExecuteCommand(f"mount {flash_path} -o remount,rw")
@@ -222,7 +546,7 @@ def remount_nvram_as_rw(session: Session) -> None:
 
     :param session: Active WinSCP session to execute the remount command.
     """
-    nvram_path = config_manager.get('paths.nvram_path')
+    nvram_path = _NVRAM_PATH
     try:
         logger.info(f"Remounting {nvram_path} as read-write")
         session.ExecuteCommand(f"mount {nvram_path} -o remount,rw")
@@ -231,58 +555,209 @@ def remount_nvram_as_rw(session: Session) -> None:
         logger.error(f"Failed to remount {nvram_path} as read-write: {e}")
         raise
 
+def get_master_fingerprint(master_files: Dict[str, str]) -> str:
+    """
+    Computes a fingerprint of the master payload from its file names, sizes and modification times.
+
+    :param master_files: A dictionary of master file names to local paths.
+    :return: A hex SHA-256 digest that changes whenever the payload changes.
+    """
+    digest = hashlib.sha256()
+    for file in sorted(master_files):
+        stat = os.stat(master_files[file])
+        digest.update(f"{file}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+def load_update_state(state_file: str) -> Dict[str, List]:
+    """
+    Loads the record of devices last brought up to date, keyed by device name.
+
+    Malformed entries (e.g. from a hand-edited or truncated file) are dropped with
+    a warning, so those devices are simply checked again.
+
+    :param state_file: Path to the JSON state file.
+    :return: A dictionary of device name to [master fingerprint, timestamp]; empty if unreadable.
+    """
+    try:
+        with open(state_file, 'r') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable update state file {state_file}: {e}")
+        return {}
+
+    if not isinstance(state, dict):
+        logger.warning(f"Ignoring update state file {state_file}: expected a JSON object")
+        return {}
+
+    valid_state = {}
+    for name, entry in state.items():
+        if (
+            isinstance(entry, list) and len(entry) == 2
+            and isinstance(entry[0], str)
+            and isinstance(entry[1], (int, float)) and not isinstance(entry[1], bool)
+        ):
+            valid_state[name] = entry
+        else:
+            logger.warning(f"Ignoring malformed update state entry for {name}: {entry!r}")
+    return valid_state
+
+def save_update_state(state_file: str, state: Dict[str, List]) -> None:
+    """
+    Atomically writes the record of devices last brought up to date.
+
+    :param state_file: Path to the JSON state file.
+    :param state: A dictionary of device name to [master fingerprint, timestamp].
+    """
+    state_dir = os.path.dirname(state_file)
+    try:
+        os.makedirs(state_dir or '.', exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=state_dir or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, state_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except Exception as e:
+        logger.error(f"Error saving update state to {state_file}: {e}")
+
 def update_file_versions(selected_devices: List[str], master_payload_folder: str) -> None:
     """
     Updates .iso and .sig files on selected devices by deleting outdated files and uploading the latest versions.
 
+    When 'operations.update_skip_ttl' is set, devices brought up to date with the
+    same master payload within that many seconds are skipped without connecting.
+
     :param selected_devices: List of device names chosen for the update.
     :param master_payload_folder: Path to the local folder containing the latest .iso and .sig files.
     """
-    flash_path = config_manager.get('paths.flash_path')
+    flash_path = _FLASH_PATH
     devices_to_process = get_devices_to_process(selected_devices)
-    master_files = {
-        file: os.path.join(master_payload_folder, file)
-        for file in os.listdir(master_payload_folder) if file.endswith('.iso') or file.endswith('.sig')
-    }
+    master_files = list_master_files(master_payload_folder, PAYLOAD_EXTENSIONS)
+
+    skip_ttl = get_positive_int_setting('operations.update_skip_ttl', 0, minimum=0)
+    if skip_ttl:
+        state_file = config_manager.get('paths.update_state_file')
+        state = load_update_state(state_file)
+        fingerprint = get_master_fingerprint(master_files)
+        now = time.time()
+        up_to_date = {
+            name for name, (device_fingerprint, updated_at) in state.items()
+            if device_fingerprint == fingerprint and now - updated_at < skip_ttl
+        }
+        for device in devices_to_process:
+            if device.name in up_to_date:
+                logger.info(f"Skipping {device.name}: already updated to the current master payload")
+        devices_to_process = [device for device in devices_to_process if device.name not in up_to_date]
 
     # Get the predefined transfer options
     transfer_options = get_transfer_options()
 
-    for device in devices_to_process:
-        session = create_session(device)
-        if not session:
-            continue
+    results = run_for_devices(
+        lambda device: update_device_files(device, flash_path, master_files, transfer_options),
+        devices_to_process,
+    )
 
-        try:
-            logger.info(f"Updating .iso and .sig files for device: {device['name']}")
-            remote_files = session.ListDirectory(flash_path).Files
-            device_files = [file.Name for file in remote_files if file.Name.endswith('.iso') or file.Name.endswith('.sig')]
+    if skip_ttl:
+        for device, in_sync in zip(devices_to_process, results):
+            if in_sync:
+                state[device.name] = [fingerprint, now]
+        save_update_state(state_file, state)
 
-            outdated_files = [file for file in device_files if file not in master_files]
+def update_device_files(device: Device, flash_path: str, master_files: Dict[str, str], transfer_options: TransferOptions) -> bool:
+    """
+    Brings the .iso and .sig files on a single device in line with the master payload.
 
-            # Determine if there are files to upload (missing on device)
-            missing_files = [file for file in master_files if file not in device_files]
+    :param device: The device to update.
+    :param flash_path: Remote path holding the .iso and .sig files.
+    :param master_files: A dictionary of master file names to local paths.
+    :param transfer_options: Transfer options used for the uploads.
+    :return: True if the device matches the master payload afterwards, False otherwise.
+    """
+    session = session_pool.get(device)
+    if not session:
+        return False
 
-            if outdated_files or missing_files:
-                # Remount the flash path as read-write before making any changes
-                remount_flash_as_rw(session)
+    try:
+        logger.info(f"Updating .iso and .sig files for device: {device.name}")
+        remote_files = list_remote_files(session, flash_path)
+        device_files = {file.Name for file in remote_files if file.Name.endswith(PAYLOAD_EXTENSIONS)}
 
-                if outdated_files:
-                    logger.info(f"Deleting outdated files: {outdated_files}")
-                    for file in outdated_files:
-                        session.RemoveFiles(f"{flash_path}/{file}").Check()
+        outdated_files = sorted(device_files - master_files.keys())
 
-                logger.info(f"Uploading latest files for {device['name']}")
-                for file, path in master_files.items():
-                    session.PutFiles(path, f"{flash_path}/{file}", False, transfer_options).Check()
-            else:
-                logger.info(f"No outdated or missing files for device {device['name']}")
+        # Determine if there are files to upload (missing on device)
+        missing_files = master_files.keys() - device_files
 
-        except Exception as e:
-            logger.error(f"Error updating files for {device['name']}: {e}")
-        finally:
-            session.Dispose()
+        if outdated_files or missing_files:
+            # Remount the flash path as read-write before making any changes
+            remount_flash_as_rw(session)
+
+            if outdated_files:
+                logger.info(f"Deleting outdated files: {outdated_files}")
+                remove_remote_files(session, flash_path, outdated_files)
+
+            logger.info(f"Uploading latest files for {device.name}")
+            upload_files(device, session, list(master_files.items()), flash_path, transfer_options)
+            invalidate_remote_listing(session, flash_path)
+        else:
+            logger.info(f"No outdated or missing files for device {device.name}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error updating files for {device.name}: {e}")
+        # The session may be broken; the next operation reconnects
+        session_pool.discard(device)
+        return False
             
+def put_files(session: Session, files: List[Tuple[str, str]], remote_path: str, transfer_options: TransferOptions) -> None:
+    """
+    Uploads local files into a remote directory, one PutFiles call per file.
+
+    :param session: Active WinSCP session for the device.
+    :param files: (file name, local path) pairs to upload.
+    :param remote_path: Remote directory receiving the files.
+    :param transfer_options: Transfer options used for the uploads.
+    """
+    for file, path in files:
+        session.PutFiles(path, posixpath.join(remote_path, file), False, transfer_options).Check()
+
+def upload_files(device: Device, session: Session, files: List[Tuple[str, str]], remote_path: str, transfer_options: TransferOptions) -> None:
+    """
+    Uploads files to a device, spreading them over several SFTP sessions when configured.
+
+    The 'operations.max_transfer_threads' setting (WINSCP_UPLOAD_STREAMS) gives the
+    number of concurrent sessions; the extra ones are opened next to the given
+    session and the files are split between them round-robin.
+
+    :param device: The device receiving the files.
+    :param session: Active WinSCP session for the device.
+    :param files: (file name, local path) pairs to upload.
+    :param remote_path: Remote directory receiving the files.
+    :param transfer_options: Transfer options used for the uploads.
+    :raises Exception: The first upload error, after all sessions have finished.
+    """
+    streams = min(get_positive_int_setting('operations.max_transfer_threads', 1), len(files))
+    if streams <= 1:
+        put_files(session, files, remote_path, transfer_options)
+        return
+
+    # Sessions that fail to open are skipped; their share goes to the others
+    sessions = [session] + [s for s in (create_session(device) for _ in range(streams - 1)) if s]
+    try:
+        with ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+            futures = [
+                executor.submit(put_files, upload_session, files[index::len(sessions)], remote_path, transfer_options)
+                for index, upload_session in enumerate(sessions)
+            ]
+        for future in futures:
+            future.result()
+    finally:
+        for extra_session in sessions[1:]:
+            close_session(extra_session)
+
 def reboot(session: Session) -> None:
     """
     Reboots the device using the specified session.
@@ -297,6 +772,44 @@ def reboot(session: Session) -> None:
         logger.error(f"Failed to initiate reboot: {e}")
         raise
 
+def run_nvram_operation(worker: Callable[[Device], None], devices: List[Device], confirm_reboot: bool) -> None:
+    """
+    Runs an NVRAM reset worker for every device.
+
+    The devices are handled one at a time unless 'operations.parallel_nvram_reset'
+    is enabled and reboots need no confirmation (each confirmation raises a Tk
+    dialog); then up to max_parallel_devices are reset and rebooted concurrently.
+
+    :param worker: Callable resetting a single device; it is expected to handle its own errors.
+    :param devices: Devices to process.
+    :param confirm_reboot: Whether the user is asked before each reboot.
+    """
+    if not confirm_reboot and config_manager.get('operations.parallel_nvram_reset', False):
+        run_for_devices(worker, devices)
+    else:
+        for device in devices:
+            worker(device)
+
+def reboot_after_reset(session: Session, device: Device, confirm_reboot: bool, reset_name: str) -> None:
+    """
+    Reboots a device after an NVRAM reset, asking the user first if configured to.
+
+    :param session: Active WinSCP session for the device.
+    :param device: The device that was reset.
+    :param confirm_reboot: Whether to ask the user before rebooting.
+    :param reset_name: Name of the reset shown in the confirmation, e.g. "NVRAM reset".
+    """
+    if confirm_reboot:
+        from tkinter import messagebox
+        reboot_confirm = messagebox.askyesno(
+            "Confirm Reboot", 
+            f"{reset_name} completed for {device.name}. Reboot device now?"
+        )
+        if reboot_confirm:
+            reboot(session)
+    else:
+        reboot(session)
+
 def nvram_reset(nvram_path: str, selected_devices: List[str]) -> None:
     """
     Resets the NVRAM by deleting all files in the specified path for selected devices.
@@ -307,33 +820,40 @@ def nvram_reset(nvram_path: str, selected_devices: List[str]) -> None:
     """
     devices_to_process = get_devices_to_process(selected_devices)
     confirm_reboot = config_manager.get('operations.confirm_before_reboot', True)
-    
-    for device in devices_to_process:
-        session = create_session(device)
-        if not session:
-            continue
 
-        try:
-            logger.info(f"Resetting NVRAM for device: {device['name']} at {nvram_path}")
-            remount_nvram_as_rw(session)
-            session.RemoveFiles(f"{nvram_path}/*").Check()
-            logger.info(f"Successfully reset NVRAM for {device['name']}")
-            
-            if confirm_reboot:
-                from tkinter import messagebox
-                reboot_confirm = messagebox.askyesno(
-                    "Confirm Reboot", 
-                    f"NVRAM reset completed for {device['name']}. Reboot device now?"
-                )
-                if reboot_confirm:
-                    reboot(session)
-            else:
-                reboot(session)
-                
-        except Exception as e:
-            logger.error(f"Error resetting NVRAM for {device['name']}: {e}")
-        finally:
-            session.Dispose()
+    run_nvram_operation(
+        lambda device: reset_device_nvram(device, nvram_path, confirm_reboot),
+        devices_to_process,
+        confirm_reboot,
+    )
+
+def reset_device_nvram(device: Device, nvram_path: str, confirm_reboot: bool) -> None:
+    """
+    Deletes all files in the NVRAM directory of a single device and reboots it.
+
+    :param device: The device to reset.
+    :param nvram_path: Path to the NVRAM directory on the device.
+    :param confirm_reboot: Whether to ask the user before rebooting.
+    """
+    session = session_pool.get(device)
+    if not session:
+        return
+
+    try:
+        logger.info(f"Resetting NVRAM for device: {device.name} at {nvram_path}")
+        remount_nvram_as_rw(session)
+        session.RemoveFiles(posixpath.join(nvram_path, "*")).Check()
+        invalidate_remote_listing(session, nvram_path)
+        logger.info(f"Successfully reset NVRAM for {device.name}")
+
+        reboot_after_reset(session, device, confirm_reboot, "NVRAM reset")
+
+    except Exception as e:
+        logger.error(f"Error resetting NVRAM for {device.name}: {e}")
+    finally:
+        # The NVRAM was remounted and the device possibly rebooted, so the
+        # session is not reused by later operations
+        session_pool.discard(device)
 
 def nvram_demo_reset(nvram_path: str, selected_devices: List[str]) -> None:
     """
@@ -345,72 +865,71 @@ def nvram_demo_reset(nvram_path: str, selected_devices: List[str]) -> None:
     :return: None
     """
     devices_to_process = get_devices_to_process(selected_devices)
-    local_demo_path = os.path.abspath(config_manager.get('paths.local_demo_path'))
+    local_demo_path = _LOCAL_DEMO_PATH
     confirm_reboot = config_manager.get('operations.confirm_before_reboot', True)
 
-    for device in devices_to_process:
-        session = create_session(device)
-        if not session:
-            continue
+    run_nvram_operation(
+        lambda device: demo_reset_device_nvram(device, nvram_path, local_demo_path, confirm_reboot),
+        devices_to_process,
+        confirm_reboot,
+    )
 
-        try:
-            logger.info(f"Running demo NVRAM reset for device: {device['name']}")
-            
-            # List all files in nvram_path and check if 'Demo.dat' is present
-            remote_directory = session.ListDirectory(nvram_path)
-            demo_file_found = any(file.Name == "Demo.dat" for file in remote_directory.Files)
+def demo_reset_device_nvram(device: Device, nvram_path: str, local_demo_path: str, confirm_reboot: bool) -> None:
+    """
+    Performs a demo reset on a single device and reboots it.
 
-            if demo_file_found:
-                # Filter out 'Demo.dat' and delete the rest of the files in nvram_path
-                logger.info(f"'Demo.dat' found in {nvram_path}")
-                remount_nvram_as_rw(session)
-                files_to_delete = [file for file in remote_directory.Files if file.Name != "Demo.dat" and file.Name != "." and file.Name != ".."]
-
-                # Delete each file except for 'Demo.dat'
-                for file in files_to_delete:
-                    logger.debug(f"Removing: {nvram_path}/{file.Name}")
-                    session.RemoveFiles(f"{nvram_path}/{file.Name}").Check()
-                    
-                logger.info(f"All files except 'Demo.dat' have been deleted from {nvram_path}")
+    :param device: The device to reset.
+    :param nvram_path: Path to the NVRAM directory on the device.
+    :param local_demo_path: Local 'Demo.dat' uploaded when the device has none.
+    :param confirm_reboot: Whether to ask the user before rebooting.
+    """
+    session = session_pool.get(device)
+    if not session:
+        return
+
+    try:
+        logger.info(f"Running demo NVRAM reset for device: {device.name}")
+        
+        # Check if 'Demo.dat' is present with a single stat instead of a listing
+        demo_file_found = session.FileExists(posixpath.join(nvram_path, "Demo.dat"))
+
+        if demo_file_found:
+            # Filter out 'Demo.dat' and delete the rest of the files in nvram_path
+            logger.info(f"'Demo.dat' found in {nvram_path}")
+            remount_nvram_as_rw(session)
+
+            # Delete every entry except for 'Demo.dat' with one command, without listing the directory
+            quoted_path = shlex.quote(nvram_path)
+            session.ExecuteCommand(
+                f"find {quoted_path} -mindepth 1 -maxdepth 1 ! -name Demo.dat -exec rm -rf -- {{}} +"
+            ).Check()
+            invalidate_remote_listing(session, nvram_path)
                 
-                if confirm_reboot:
-                    from tkinter import messagebox
-                    reboot_confirm = messagebox.askyesno(
-                        "Confirm Reboot", 
-                        f"NVRAM demo reset completed for {device['name']}. Reboot device now?"
-                    )
-                    if reboot_confirm:
-                        reboot(session)
-                else:
-                    reboot(session)
+            logger.info(f"All files except 'Demo.dat' have been deleted from {nvram_path}")
             
-            else:
-                logger.info(f"'Demo.dat' not found in {nvram_path}, uploading from {local_demo_path}...")
+            reboot_after_reset(session, device, confirm_reboot, "NVRAM demo reset")
+        
+        else:
+            logger.info(f"'Demo.dat' not found in {nvram_path}, uploading from {local_demo_path}...")
+            
+            if os.path.exists(local_demo_path):
+                remount_nvram_as_rw(session)
+                session.PutFiles(local_demo_path, posixpath.join(nvram_path, "Demo.dat")).Check()
+                invalidate_remote_listing(session, nvram_path)
+                logger.info(f"'Demo.dat' successfully uploaded to {nvram_path}")
                 
-                if os.path.exists(local_demo_path):
-                    remount_nvram_as_rw(session)
-                    session.PutFiles(local_demo_path, f"{nvram_path}/Demo.dat").Check()
-                    logger.info(f"'Demo.dat' successfully uploaded to {nvram_path}")
-                    
-                    if confirm_reboot:
-                        from tkinter import messagebox
-                        reboot_confirm = messagebox.askyesno(
-                            "Confirm Reboot", 
-                            f"NVRAM demo reset completed for {device['name']}. Reboot device now?"
-                        )
-                        if reboot_confirm:
-                            reboot(session)
-                    else:
-                        reboot(session)
-                else:
-                    logger.error(f"Local 'Demo.dat' not found at {local_demo_path}")
-                    return
-
-            logger.info(f"Successfully demo-reset NVRAM for {device['name']}")
-        except Exception as e:
-            logger.error(f"Error during demo reset for {device['name']}: {e}")
-        finally:
-            session.Dispose()
+                reboot_after_reset(session, device, confirm_reboot, "NVRAM demo reset")
+            else:
+                logger.error(f"Local 'Demo.dat' not found at {local_demo_path}")
+                return
+
+        logger.info(f"Successfully demo-reset NVRAM for {device.name}")
+    except Exception as e:
+        logger.error(f"Error during demo reset for {device.name}: {e}")
+    finally:
+        # The NVRAM was remounted and the device possibly rebooted, so the
+        # session is not reused by later operations
+        session_pool.discard(device)
 
 def display_outdated_files_to_user(outdated_files_info: Dict[str, List[str]], master_files: Dict[str, str]) -> None:
     """
@@ -429,12 +948,12 @@ def display_outdated_files_to_user(outdated_files_info: Dict[str, List[str]], ma
         messagebox.showinfo("Up-to-Date Files", message)
         return
 
-    message = "The following devices have outdated .iso files:\n\n"
-    for device, files in outdated_files_info.items():
-        message += f"{device}:\n" + "\n".join(files) + "\n\n"
+    parts = ["The following devices have outdated .iso files:\n\n"]
+    parts.extend(f"{device}:\n" + "\n".join(files) + "\n\n" for device, files in outdated_files_info.items())
 
     # Add master_files to the message
-    message += "Master files:\n" + "\n".join(master_files.keys())
+    parts.append("Master files:\n" + "\n".join(master_files.keys()))
+    message = "".join(parts)
 
     messagebox.showinfo("Outdated ISO Files", message)
 
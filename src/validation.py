@@ -28,6 +28,12 @@ OPERATION_RULES = {
     },
 }
 
+def operation_label(op):
+    """
+    Returns the display name of an operation key, e.g. 'download_logs' -> 'Download Logs'.
+    """
+    return op.replace('_', ' ').title()
+
 def validate_operations(selected_operations):
     """
     Validates the selected operations against the defined rules.
@@ -43,15 +49,15 @@ def validate_operations(selected_operations):
     for op in selected_ops:
         excludes = OPERATION_RULES[op]['excludes']
         if any(excluded_op in selected_ops for excluded_op in excludes):
-            excluded_op_names = [op.replace('_', ' ').title() for op in excludes if op in selected_ops]
-            raise ValueError(f"Operation '{op.replace('_', ' ').title()}' cannot be selected with {', '.join(excluded_op_names)}")
+            excluded_op_names = [operation_label(op) for op in excludes if op in selected_ops]
+            raise ValueError(f"Operation '{operation_label(op)}' cannot be selected with {', '.join(excluded_op_names)}")
     
     # Check for required operations
     for op in selected_ops:
         requires = OPERATION_RULES[op]['requires']
         if any(req_op not in selected_ops for req_op in requires):
-            required_op_names = [op.replace('_', ' ').title() for op in requires]
-            raise ValueError(f"Operation '{op.replace('_', ' ').title()}' requires {', '.join(required_op_names)} to be selected")
+            required_op_names = [operation_label(op) for op in requires]
+            raise ValueError(f"Operation '{operation_label(op)}' requires {', '.join(required_op_names)} to be selected")
     
     # No need to enforce selection order; operations will be executed in the correct order
     return True
\ No newline at end of file